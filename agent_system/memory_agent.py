@@ -1,3 +1,4 @@
+import asyncio
 import os
 import sys
 from typing import Dict, Any, List
@@ -129,7 +130,7 @@ CRITICAL: When extracting rule_description from dual intent:
 
 Parse intelligently using keywords, conjunctions, and context.""",
             model=intent_profile.model,
-            model_settings=intent_profile.to_model_settings(),
+            model_settings=intent_profile.model_settings,
             output_type=IntentClassification
         )
         self.logger.log(f"Created Intent Classifier ({intent_profile.model}, reasoning={intent_profile.reasoning_effort}, verbosity={intent_profile.verbosity})")
@@ -147,7 +148,7 @@ Your task is to:
 
 Make the rule_instruction clear, specific, and actionable so it can be applied in future contexts.""",
             model=rule_profile.model,
-            model_settings=rule_profile.to_model_settings(),
+            model_settings=rule_profile.model_settings,
             output_type=RuleData
         )
         self.logger.log(f"Created Rule Extractor ({rule_profile.model}, reasoning={rule_profile.reasoning_effort}, verbosity={rule_profile.verbosity})")
@@ -161,7 +162,7 @@ Return the 1-based indices of relevant rules. Only include rules that directly a
 
 Be selective - only include rules that are truly relevant to executing the current task.""",
             model=filter_profile.model,
-            model_settings=filter_profile.to_model_settings(),
+            model_settings=filter_profile.model_settings,
             output_type=RelevantRulesOutput
         )
         self.logger.log(f"Created Rule Filter ({filter_profile.model}, reasoning={filter_profile.reasoning_effort}, verbosity={filter_profile.verbosity})")
@@ -191,7 +192,7 @@ COMPLEX (medium reasoning, 45 turns):
 
 Output complexity level, reasoning, suggested_reasoning_effort, and suggested_max_turns.""",
             model=complexity_profile.model,
-            model_settings=complexity_profile.to_model_settings(),
+            model_settings=complexity_profile.model_settings,
             output_type=TaskComplexity
         )
         self.logger.log(f"Created Complexity Classifier ({complexity_profile.model}, reasoning={complexity_profile.reasoning_effort}, verbosity={complexity_profile.verbosity})")
@@ -418,14 +419,14 @@ Return the indices of relevant rules (1-based). Be selective."""
         """
         self.logger.log("=== MEMORY AGENT PROCESSING (AGENTS SDK, DUAL INTENT) ===")
         
-        # Classify intent (now returns full classification object)
-        classification = await self.classify_intent_async(input_body)
-        
-        # Classify complexity for optimization
-        complexity = await self.classify_complexity_async(input_body)
-        
-        # Fetch all rules from database
-        all_rules = self.supabase.get_all_rules()
+        # Classify intent (full classification object) and complexity while
+        # the rules load; the Supabase client is synchronous, so it runs in a
+        # worker thread instead of blocking the event loop
+        classification, complexity, all_rules = await asyncio.gather(
+            self.classify_intent_async(input_body),
+            self.classify_complexity_async(input_body),
+            asyncio.to_thread(self.supabase.get_all_rules)
+        )
         self.logger.log(f"Fetched {len(all_rules)} rules from database")
         
         created_rule = None
@@ -442,7 +443,8 @@ Return the indices of relevant rules (1-based). Be selective."""
             )
             
             # Insert rule into database
-            created_rule = self.supabase.insert_rule(
+            created_rule = await asyncio.to_thread(
+                self.supabase.insert_rule,
                 rule_maker=rule_data["rule_maker"],
                 rule_org=rule_data["rule_org"],
                 rule_instruction=rule_data["rule_instruction"]
@@ -451,8 +453,10 @@ Return the indices of relevant rules (1-based). Be selective."""
             self.logger.log(f"✅ Rule created with ID: {created_rule.get('id')}")
             self.logger.log(f"Rule: {created_rule.get('rule_instruction')}")
             
-            # Refresh rules to include the newly created one
-            all_rules = self.supabase.get_all_rules()
+            # Include the newly created rule (the insert returned the full row,
+            # so no second round-trip to re-read rules_db is needed)
+            if created_rule:
+                all_rules = [*all_rules, created_rule]
             self.logger.log(f"Rules refreshed: {len(all_rules)} total (including new rule)")
         
         # Handle action execution if present
@@ -21,6 +21,18 @@ from agent_system.subagents.task_analytics_agent import TaskAnalyticsAgent
 from agent_system.subagents.code_interpreter_agent import CodeInterpreterAgent
 from config.agent_config import get_orchestrator_profile
 
+# Pooled sub-agents (4 communication + 3 analytics + 1 code interpreter)
+SUBAGENT_CLASSES = {
+    "calendar": CalendarAgent,
+    "email": EmailAgent,
+    "report_writer": ReportWriterAgent,
+    "whatsapp": WhatsAppAgent,
+    "employee_analytics": EmployeeAnalyticsAgent,
+    "project_analytics": ProjectAnalyticsAgent,
+    "task_analytics": TaskAnalyticsAgent,
+    "code_interpreter": CodeInterpreterAgent
+}
+
 class OrchestratorAgent:
     """
     DiddyMac Orchestrator Agent (Agents SDK Edition)
@@ -47,17 +59,12 @@ class OrchestratorAgent:
         self.plan_manager = PlanManager()
         self.memory_storage = MemoryStorage()
         
-        # Initialize sub-agents (4 communication + 3 analytics + 1 code interpreter)
+        # Fetch pooled sub-agents
+        # Agent objects are built once per process and reused across requests
         self.logger.log("Initializing sub-agents with Agents SDK...")
         self.subagents = {
-            "calendar": CalendarAgent(logger),
-            "email": EmailAgent(logger),
-            "report_writer": ReportWriterAgent(logger),
-            "whatsapp": WhatsAppAgent(logger),
-            "employee_analytics": EmployeeAnalyticsAgent(logger),
-            "project_analytics": ProjectAnalyticsAgent(logger),
-            "task_analytics": TaskAnalyticsAgent(logger),
-            "code_interpreter": CodeInterpreterAgent(logger)
+            key: agent_class.get_instance(logger)
+            for key, agent_class in SUBAGENT_CLASSES.items()
         }
         
         self.logger.log(f"Sub-agents initialized: {', '.join(self.subagents.keys())}")
@@ -68,6 +75,18 @@ class OrchestratorAgent:
         self.logger.log("Orchestrator Agent initialization complete (will create dynamically per request)")
         self.logger.log("Sub-agents ready to be configured as tools using 'agents as tools' pattern")
     
+    @staticmethod
+    def warm_up():
+        """
+        Build the pooled sub-agents ahead of the first request
+        
+        Constructing them fetches Composio tool specs and sets up the
+        Composio/OpenAI clients, so doing it at process start keeps that
+        latency off the first user request.
+        """
+        for agent_class in SUBAGENT_CLASSES.values():
+            agent_class.get_instance()
+    
     def _create_dynamic_orchestrator(self, complexity: str = "MEDIUM") -> Agent:
         """
         Create orchestrator Agent with complexity-appropriate optimization settings
@@ -143,7 +162,7 @@ class OrchestratorAgent:
             name="Orchestrator Agent",
             instructions=instructions,
             model=profile.model,
-            model_settings=profile.to_model_settings(),  # Dynamic reasoning + verbosity!
+            model_settings=profile.model_settings,  # Dynamic reasoning + verbosity!
             tools=[
                 calendar_tool, 
                 email_tool, 
@@ -1,3 +1,4 @@
+import copy
 import os
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Optional
@@ -27,6 +28,37 @@ class BaseSubAgent(ABC):
     - Return synthesized results via tool_use_behavior
     """
     
+    # Process-wide pooled instances keyed by subclass (see get_instance);
+    # they hold no request logger and are never mutated after construction
+    _instances: Dict[type, "BaseSubAgent"] = {}
+    
+    @classmethod
+    def get_instance(cls, logger=None) -> "BaseSubAgent":
+        """
+        Get a per-request handle on the pooled sub-agent, creating it on first use
+        
+        The Agent object (tools, instructions, model settings) is built once per
+        process and shared; each call returns a shallow copy bound to the given
+        logger, so concurrent requests never log into each other's files.
+        
+        Args:
+            logger: Optional logger instance for the current request
+        
+        Returns:
+            Instance of the sub-agent class sharing the pooled Agent
+        """
+        pooled = BaseSubAgent._instances.get(cls)
+        if pooled is None:
+            instance = cls(logger)
+            pooled = copy.copy(instance)
+            pooled.logger = None
+            BaseSubAgent._instances[cls] = pooled
+            return instance
+        
+        instance = copy.copy(pooled)
+        instance.logger = logger
+        return instance
+    
     def __init__(
         self,
         name: str,
@@ -55,6 +87,7 @@ class BaseSubAgent(ABC):
         self.description = description
         self.logger = logger
         self.user_id = "default"
+        self._tool_cache: Dict[tuple, Any] = {}  # (tool_name, tool_description) -> tool
         
         # Get optimization profile
         if profile:
@@ -180,7 +213,7 @@ RESPONSE: State actions taken, summarize results, include relevant details, note
             name=self.name,
             instructions=instructions,
             model=self.profile.model,
-            model_settings=self.profile.to_model_settings(),  # Dynamic reasoning + verbosity!
+            model_settings=self.profile.model_settings,  # Dynamic reasoning + verbosity!
             tools=tools_list,  # Use combined tools (Composio + custom)
             tool_use_behavior="run_llm_again"  # Default: run LLM again after tools
         )
@@ -210,18 +243,25 @@ RESPONSE: State actions taken, summarize results, include relevant details, note
             tool_description: Custom tool description (defaults to agent description)
         
         Returns:
-            Tool representation of this agent
+            Tool representation of this agent (identity-stable per name/description)
         """
         name = tool_name or self.name.lower().replace(" ", "_")
         desc = tool_description or self.description
         
+        # Reuse the wrapper built for this (name, description) pair
+        cached = self._tool_cache.get((name, desc))
+        if cached is not None:
+            return cached
+        
         if self.logger:
             self.logger.log(f"Converting {self.name} to tool: {name}")
         
-        return self.agent.as_tool(
+        tool = self.agent.as_tool(
             tool_name=name,
             tool_description=desc
         )
+        self._tool_cache[(name, desc)] = tool
+        return tool
     
     async def run(self, task: str, context: Optional[Any] = None, max_turns: int = 10) -> Any:
         """
@@ -239,7 +279,7 @@ RESPONSE: State actions taken, summarize results, include relevant details, note
         
         if self.logger:
             self.logger.log(f"=== {self.name.upper()} RUNNING ===")
-            self.logger.log(f"Task: {task}")
+            self.logger.log("Task: %s", "INFO", task)
             self.logger.log(f"Max turns: {max_turns}")
         
         try:
@@ -255,7 +295,7 @@ RESPONSE: State actions taken, summarize results, include relevant details, note
             
             if self.logger:
                 self.logger.log(f"{self.name} completed successfully")
-                self.logger.log(f"Final output: {result.final_output[:200]}..." if len(str(result.final_output)) > 200 else f"Final output: {result.final_output}")
+                self.logger.log("Final output: %.200s", "INFO", result.final_output)
             
             return result
         
@@ -276,11 +316,11 @@ RESPONSE: State actions taken, summarize results, include relevant details, note
         Returns:
             Dictionary with success status and result
         """
-        import asyncio
+        from utils.event_loop import run_sync
         
         if self.logger:
             self.logger.log(f"=== {self.name.upper()} PROCESSING (SYNC WRAPPER) ===")
-            self.logger.log(f"Task: {task_description}")
+            self.logger.log("Task: %s", "INFO", task_description)
         
         try:
             # Build input with context if provided
@@ -289,7 +329,7 @@ RESPONSE: State actions taken, summarize results, include relevant details, note
                 input_text += f"\n\nContext: {context}"
             
             # Run async method in sync context
-            result = asyncio.run(self.run(input_text))
+            result = run_sync(self.run(input_text))
             
             return {
                 "success": True,
@@ -1,4 +1,5 @@
 from agents import Agent, CodeInterpreterTool
+import copy
 import sys
 import os
 
@@ -14,10 +15,26 @@ class CodeInterpreterAgent:
     Configured with GPT-4.1 for code execution capabilities
     """
     
+    _instance = None  # pooled instance (no request logger, never mutated)
+    
+    @classmethod
+    def get_instance(cls, logger=None) -> "CodeInterpreterAgent":
+        """Get a per-request handle on the pooled instance, bound to the logger"""
+        if cls._instance is None:
+            instance = cls(logger)
+            cls._instance = copy.copy(instance)
+            cls._instance.logger = None
+            return instance
+        
+        instance = copy.copy(cls._instance)
+        instance.logger = logger
+        return instance
+    
     def __init__(self, logger=None):
         """Initialize Code Interpreter Agent"""
         self.name = "Code Interpreter Agent"
         self.logger = logger
+        self._tool_cache = {}  # (tool_name, tool_description) -> tool
         
         # Code Interpreter agent uses GPT-4.1 (required for code execution)
         self.profile = AgentOptimizationProfile(
@@ -173,7 +190,7 @@ OUTPUT: Always confirm what was created, include file size, dimensions, and prev
             name=self.name,
             instructions=instructions,
             model=self.profile.model,
-            model_settings=self.profile.to_model_settings(),
+            model_settings=self.profile.model_settings,
             tools=[
                 CodeInterpreterTool(
                     tool_config={"type": "code_interpreter", "container": {"type": "auto"}}
@@ -196,13 +213,19 @@ OUTPUT: Always confirm what was created, include file size, dimensions, and prev
         name = tool_name or "code_interpreter_expert"
         desc = tool_description or "Create data visualizations, charts, CSV/Excel files, and perform data analysis using Python code execution"
         
+        cached = self._tool_cache.get((name, desc))
+        if cached is not None:
+            return cached
+        
         if self.logger:
             self.logger.log(f"Converting {self.name} to tool: {name}")
         
-        return self.agent.as_tool(
+        tool = self.agent.as_tool(
             tool_name=name,
             tool_description=desc
         )
+        self._tool_cache[(name, desc)] = tool
+        return tool
     
     async def run(self, task: str, context=None, max_turns: int = 10):
         """Run the agent on a task"""
@@ -210,7 +233,7 @@ OUTPUT: Always confirm what was created, include file size, dimensions, and prev
         
         if self.logger:
             self.logger.log(f"=== {self.name.upper()} RUNNING ===")
-            self.logger.log(f"Task: {task}")
+            self.logger.log("Task: %s", "INFO", task)
         
         try:
             with trace(f"{self.name}"):
@@ -3,6 +3,7 @@ from agent_system.tools.analytics_tools import (
     get_task_variance_analysis,
     get_task_progress_status,
     update_foreman_task_progress,
+    update_foreman_task_progress_bulk,
     get_task_efficiency_summary
 )
 
@@ -21,6 +22,7 @@ class TaskAnalyticsAgent(BaseSubAgent):
                 get_task_variance_analysis,
                 get_task_progress_status,
                 update_foreman_task_progress,
+                update_foreman_task_progress_bulk,
                 get_task_efficiency_summary
             ],
             description="Specialized agent for task-level variance analysis, foreman progress tracking, and efficiency metrics from DDMac Analytics database",
@@ -30,7 +32,7 @@ class TaskAnalyticsAgent(BaseSubAgent):
         
         if logger:
             logger.log("Task Analytics Agent initialized with optimization profile")
-            logger.log("Tools: 4 custom DDMac Analytics Supabase tools")
+            logger.log("Tools: 5 custom DDMac Analytics Supabase tools")
     
     def get_specialized_instructions(self) -> str:
         """
@@ -46,6 +48,7 @@ AVAILABLE TOOLS:
 - get_task_variance_analysis: Tasks over/under budget with variance percentages
 - get_task_progress_status: Foreman progress for all tasks in a project
 - update_foreman_task_progress: Update foreman progress percentage for a task
+- update_foreman_task_progress_bulk: Update progress for several tasks in one call (prefer when updating more than one task)
 - get_task_efficiency_summary: Efficiency ratings (actual/estimated ratios)
 
 DATA SOURCE: DDMac Analytics Supabase (separate from communication database)
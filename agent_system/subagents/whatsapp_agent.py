@@ -1,5 +1,5 @@
 from .base_subagent import BaseSubAgent
-from agent_system.tools.whatsapp_zapier_tool import send_whatsapp_via_zapier
+from agent_system.tools.whatsapp_zapier_tool import send_whatsapp_via_zapier, send_whatsapp_batch, batch_webhook_configured
 
 class WhatsAppAgent(BaseSubAgent):
     """
@@ -11,10 +11,17 @@ class WhatsAppAgent(BaseSubAgent):
     """
     
     def __init__(self, logger=None):
+        # The batch tool needs its own Zap; without one, multi-recipient
+        # notifications go through the single-message webhook
+        self.batch_enabled = batch_webhook_configured()
+        custom_tools = [send_whatsapp_via_zapier]
+        if self.batch_enabled:
+            custom_tools.append(send_whatsapp_batch)
+        
         super().__init__(
             name="WhatsApp Agent",
             toolkits=[],  # No Composio toolkits - using custom tool
-            custom_tools=[send_whatsapp_via_zapier],  # Zapier webhook tool
+            custom_tools=custom_tools,  # Zapier webhook tools
             description="Send WhatsApp messages and confirmations via Zapier webhook integration",
             logger=logger,
             agent_type="whatsapp"
@@ -23,13 +30,19 @@ class WhatsAppAgent(BaseSubAgent):
         if logger:
             logger.log("WhatsApp Agent initialized with optimization profile")
             logger.log("Integration: Zapier webhook (custom function tool)")
-            logger.log("Tool: send_whatsapp_via_zapier")
+            logger.log(f"Tools: {', '.join(t.name for t in custom_tools)}")
     
     def get_specialized_instructions(self) -> str:
         """
         Compressed WhatsApp-specific instructions
         """
-        return """TOOL: send_whatsapp_via_zapier(phone_number: str, message: str)
+        if self.batch_enabled:
+            tools = """- send_whatsapp_via_zapier(phone_number: str, message: str) - single recipient
+- send_whatsapp_batch(messages: [{phone_number, message}]) - PREFER when >1 recipient (one webhook call)"""
+        else:
+            tools = """- send_whatsapp_via_zapier(phone_number: str, message: str) - one call per recipient"""
+        
+        return "TOOLS:\n" + tools + """
 
 PHONE FORMAT (CRITICAL):
 - MUST include + prefix: +919932270002 (India), +14165551234 (USA)
@@ -3,17 +3,123 @@ Custom Analytics Tools for DDMac Analytics Agents
 Uses separate DDMac Analytics Supabase database
 """
 from agents import function_tool
+import asyncio
 import os
+import re
 import sys
+from collections import defaultdict
+from functools import lru_cache
+from heapq import nlargest
+from operator import itemgetter
+import numpy as np
 from dotenv import load_dotenv
-from typing import Optional
+from pydantic import BaseModel
+from typing import List, Optional
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 load_dotenv()
 
-from utils.ddmac_analytics_client import DDMacAnalyticsClient
+from utils.ddmac_analytics_client import DDMacAnalyticsClient, RPCNotFoundError
+
+# PostgREST filter that drops the EVERYTHING roll-up rows server-side
+_EXCLUDE_EVERYTHING = ("not.ilike", "*EVERYTHING*")
+
+# Client-side EVERYTHING check for RPC results (no per-row .upper() copy)
+_EVERYTHING_SEARCH = re.compile("EVERYTHING", re.IGNORECASE).search
+
+# Efficiency thresholds for np.digitize and the category each bin maps to
+_EFFICIENCY_BINS = np.array([60.0, 75.0, 90.0])
+_EFFICIENCY_CATEGORIES = (
+    ("Poor", "🔴"),
+    ("Fair", "⚠️"),
+    ("Good", "✅"),
+    ("Excellent", "🌟"),
+)
+
+def _task_hours(tasks: List[dict]) -> tuple:
+    """Estimated and actual hours of task summary rows as float64 arrays"""
+    count = len(tasks)
+    estimates = np.fromiter((t.get('time_estimate') or 0 for t in tasks), dtype=np.float64, count=count)
+    actuals = np.fromiter((t.get('duration_hours') or 0 for t in tasks), dtype=np.float64, count=count)
+    return estimates, actuals
+
+def _without_everything(rows: List[dict]) -> List[dict]:
+    """Drop EVERYTHING roll-up rows from RPC results that cannot be filtered server-side"""
+    # Bind lookups to locals once instead of resolving them per row
+    search = _EVERYTHING_SEARCH
+    get = dict.get
+    return [row for row in rows if not search(get(row, 'task_name') or '')]
+
+class TaskProgressUpdate(BaseModel):
+    """Single task/progress pair for bulk foreman updates"""
+    task_id: int
+    progress_percent: float
+
+@lru_cache(maxsize=1)
+def _client() -> DDMacAnalyticsClient:
+    """Shared analytics client (its HTTP session keeps connections alive across tool calls)"""
+    return DDMacAnalyticsClient()
+
+# ============================================================================
+# REPORT TEMPLATES (parsed once, filled with str.format_map)
+# ============================================================================
+
+_EMPLOYEE_SUMMARY_TEMPLATE = """Employee Summary - {name}
+
+Work Period: {period}
+Total Hours: {hours:.1f} hours
+Days Worked: {days} days
+Avg Hours/Day: {avg_daily:.1f} hours
+
+Clients Worked: {clients} clients
+Tasks Completed: {tasks} tasks
+
+Utilization Rate: {utilization:.1f}%
+Performance: {performance}
+"""
+
+_TEAM_OVERVIEW_TEMPLATE = """Team Overview
+
+Period: {period}
+Active Employees: {employees}
+Total Team Hours: {hours:.1f} hours
+Avg Hours/Employee: {avg_hours:.1f} hours
+Avg Utilization: {avg_utilization:.1f}%
+
+Top 5 Performers (by hours):
+"""
+
+_CLIENT_BREAKDOWN_TEMPLATE = """Client Time Distribution - Employee ID {user_id}
+
+Period: {period}
+Total Hours: {hours:.1f} hours
+Unique Clients: {clients}
+
+Top Clients:
+"""
+
+_PRODUCTIVITY_TEMPLATE = """{emoji} Productivity Score - {name}
+
+Utilization Rate: {utilization:.1f}%
+Performance Category: {category}
+Total Hours: {hours:.1f} hrs
+Days Worked: {days} days
+Daily Average: {avg_daily:.1f} hrs/day
+"""
+
+# Per-row report lines, filled with the % operator and a tuple
+_PERFORMER_LINE = "%d. %s: %.1f hrs (%.1f%% utilization)\n"
+_CLIENT_LINE = "%d. %s: %.1f hrs (%.1f%%) - %s sessions, %.1fh avg\n"
+_PROJECT_STATUS_LINE = "%d. %s %s: %.1f/%.1f hrs (%.0f%%)\n"
+_TEAM_MEMBER_LINE = "%d. %s: %.1f hrs (%.1f%%)\n"
+_BUDGET_TASK_LINE = "%d. %s: %.1f hrs\n"
+_OVER_BUDGET_LINE = "%d. %s: +%.1f hrs (%+.1f%%)\n"
+_UNDER_BUDGET_LINE = "%d. %s: %.1f hrs (%.1f%%)\n"
+_TASK_PROGRESS_LINE = "%s %s: %.0f%% complete\n"
+_TASK_NO_PROGRESS_LINE = "⚪ %s: No progress reported\n"
+_EFFICIENCY_LINE = "%d. %s %s: %.1f%% (%s)\n"
 
 # ============================================================================
 # EMPLOYEE ANALYTICS TOOLS
@@ -33,10 +139,11 @@ async def get_employee_summary(user_id: int, start_date: Optional[str] = None, e
         Formatted text summary of employee metrics and performance
     """
     try:
-        client = DDMacAnalyticsClient()
+        client = _client()
         
         # Call the comprehensive employee analytics RPC
-        result = client.execute_rpc(
+        result = await asyncio.to_thread(
+            client.execute_rpc,
             'get_comprehensive_employee_analytics',
             {
                 'start_date_param': start_date,
@@ -54,25 +161,20 @@ async def get_employee_summary(user_id: int, start_date: Optional[str] = None, e
             return f"❌ No data found for employee ID {user_id}"
         
         emp = employee_data[0]
+        utilization = emp.get('utilization_rate', 0)
         
         # Format response
-        period_str = f"{start_date or 'All time'} to {end_date or 'Present'}"
-        
-        summary = f"""Employee Summary - {emp.get('employee_name', 'Unknown')}
-
-Work Period: {period_str}
-Total Hours: {emp.get('total_work_hours', 0):.1f} hours
-Days Worked: {emp.get('actual_work_days', 0)} days
-Avg Hours/Day: {emp.get('average_daily_hours', 0):.1f} hours
-
-Clients Worked: {len(emp.get('client_list', []))} clients
-Tasks Completed: {len(emp.get('task_list', []))} tasks
-
-Utilization Rate: {emp.get('utilization_rate', 0):.1f}%
-Performance: {'High Performance' if emp.get('utilization_rate', 0) >= 90 else 'Good Performance' if emp.get('utilization_rate', 0) >= 75 else 'Needs Improvement'}
-"""
-        
-        return summary
+        return _EMPLOYEE_SUMMARY_TEMPLATE.format_map({
+            'name': emp.get('employee_name', 'Unknown'),
+            'period': f"{start_date or 'All time'} to {end_date or 'Present'}",
+            'hours': emp.get('total_work_hours', 0),
+            'days': emp.get('actual_work_days', 0),
+            'avg_daily': emp.get('average_daily_hours', 0),
+            'clients': len(emp.get('client_list', [])),
+            'tasks': len(emp.get('task_list', [])),
+            'utilization': utilization,
+            'performance': 'High Performance' if utilization >= 90 else 'Good Performance' if utilization >= 75 else 'Needs Improvement'
+        })
         
     except Exception as e:
         return f"❌ Error fetching employee summary: {str(e)}"
@@ -90,10 +192,11 @@ async def get_all_employees_overview(start_date: Optional[str] = None, end_date:
         Formatted text summary of all employees and team metrics
     """
     try:
-        client = DDMacAnalyticsClient()
+        client = _client()
         
         # Get all employees data
-        result = client.execute_rpc(
+        result = await asyncio.to_thread(
+            client.execute_rpc,
             'get_comprehensive_employee_analytics',
             {
                 'start_date_param': start_date,
@@ -111,26 +214,21 @@ async def get_all_employees_overview(start_date: Optional[str] = None, end_date:
         avg_utilization = sum(emp.get('utilization_rate', 0) for emp in result) / total_employees if total_employees > 0 else 0
         
         # Get top performers
-        sorted_employees = sorted(result, key=lambda x: x.get('total_work_hours', 0), reverse=True)
-        top_5 = sorted_employees[:5]
-        
-        period_str = f"{start_date or 'All time'} to {end_date or 'Present'}"
+        top_5 = nlargest(5, result, key=lambda x: x.get('total_work_hours', 0))
         
-        summary = f"""Team Overview
-
-Period: {period_str}
-Active Employees: {total_employees}
-Total Team Hours: {total_hours:.1f} hours
-Avg Hours/Employee: {avg_hours:.1f} hours
-Avg Utilization: {avg_utilization:.1f}%
-
-Top 5 Performers (by hours):
-"""
+        summary = _TEAM_OVERVIEW_TEMPLATE.format_map({
+            'period': f"{start_date or 'All time'} to {end_date or 'Present'}",
+            'employees': total_employees,
+            'hours': total_hours,
+            'avg_hours': avg_hours,
+            'avg_utilization': avg_utilization
+        })
+        parts = [summary]
         
         for i, emp in enumerate(top_5, 1):
-            summary += f"{i}. {emp.get('employee_name', 'Unknown')}: {emp.get('total_work_hours', 0):.1f} hrs ({emp.get('utilization_rate', 0):.1f}% utilization)\n"
+            parts.append(_PERFORMER_LINE % (i, emp.get('employee_name', 'Unknown'), emp.get('total_work_hours', 0), emp.get('utilization_rate', 0)))
         
-        return summary
+        return "".join(parts)
         
     except Exception as e:
         return f"❌ Error fetching team overview: {str(e)}"
@@ -149,45 +247,47 @@ async def get_employee_client_breakdown(user_id: int, start_date: Optional[str]
         Formatted breakdown of hours per client with statistics
     """
     try:
-        client = DDMacAnalyticsClient()
+        client = _client()
         
-        # Get client time distribution
-        result = client.execute_rpc(
-            'get_user_client_time_distribution',
+        # Top 10 clients by hours; every row also carries the employee's
+        # overall total hours and client count (computed before the limit)
+        result = await asyncio.to_thread(
+            client.execute_rpc,
+            'get_user_client_time_distribution_top',
             {
                 'user_id_param': user_id,
                 'start_date_param': start_date or '2020-01-01',
-                'end_date_param': end_date or '2100-01-01'
+                'end_date_param': end_date or '2100-01-01',
+                'limit_param': 10
             }
         )
         
         if not result:
             return f"❌ No client distribution data for employee ID {user_id}"
         
-        # Sort by total hours
-        sorted_clients = sorted(result, key=lambda x: x.get('total_hours', 0), reverse=True)
+        # Already sorted and limited server-side
+        sorted_clients = result
         
-        total_hours = sum(c.get('total_hours', 0) for c in sorted_clients)
+        total_hours = sorted_clients[0].get('overall_total_hours') or 0
         
-        summary = f"""Client Time Distribution - Employee ID {user_id}
-
-Period: {start_date or 'All time'} to {end_date or 'Present'}
-Total Hours: {total_hours:.1f} hours
-Unique Clients: {len(sorted_clients)}
-
-Top Clients:
-"""
+        summary = _CLIENT_BREAKDOWN_TEMPLATE.format_map({
+            'user_id': user_id,
+            'period': f"{start_date or 'All time'} to {end_date or 'Present'}",
+            'hours': total_hours,
+            'clients': sorted_clients[0].get('client_count', len(sorted_clients))
+        })
+        parts = [summary]
         
-        for i, c in enumerate(sorted_clients[:10], 1):
+        for i, c in enumerate(sorted_clients, 1):
             client_name = c.get('client_name', 'Unknown')
             hours = c.get('total_hours', 0)
             sessions = c.get('sessions', 0)
             avg_session = c.get('avg_session_hours', 0)
             pct = (hours / total_hours * 100) if total_hours > 0 else 0
             
-            summary += f"{i}. {client_name}: {hours:.1f} hrs ({pct:.1f}%) - {sessions} sessions, {avg_session:.1f}h avg\n"
+            parts.append(_CLIENT_LINE % (i, client_name, hours, pct, sessions, avg_session))
         
-        return summary
+        return "".join(parts)
         
     except Exception as e:
         return f"❌ Error fetching client breakdown: {str(e)}"
@@ -204,10 +304,11 @@ async def get_employee_productivity_score(user_id: int) -> str:
         Productivity score with performance category
     """
     try:
-        client = DDMacAnalyticsClient()
+        client = _client()
         
         # Get employee summary
-        result = client.execute_rpc(
+        result = await asyncio.to_thread(
+            client.execute_rpc,
             'get_comprehensive_employee_analytics',
             {
                 'start_date_param': None,
@@ -237,14 +338,15 @@ async def get_employee_productivity_score(user_id: int) -> str:
             category = "Needs Improvement"
             emoji = "⚠️"
         
-        return f"""{emoji} Productivity Score - {emp.get('employee_name', 'Unknown')}
-
-Utilization Rate: {utilization:.1f}%
-Performance Category: {category}
-Total Hours: {emp.get('total_work_hours', 0):.1f} hrs
-Days Worked: {emp.get('actual_work_days', 0)} days
-Daily Average: {emp.get('average_daily_hours', 0):.1f} hrs/day
-"""
+        return _PRODUCTIVITY_TEMPLATE.format_map({
+            'emoji': emoji,
+            'name': emp.get('employee_name', 'Unknown'),
+            'utilization': utilization,
+            'category': category,
+            'hours': emp.get('total_work_hours', 0),
+            'days': emp.get('actual_work_days', 0),
+            'avg_daily': emp.get('average_daily_hours', 0)
+        })
         
     except Exception as e:
         return f"❌ Error calculating productivity: {str(e)}"
@@ -265,38 +367,23 @@ async def get_project_overview(job_name: str) -> str:
         Formatted project summary with key metrics
     """
     try:
-        client = DDMacAnalyticsClient()
+        client = _client()
         
-        # Get project estimates from accubid_breakdowns
-        estimates = client.query_table(
-            "accubid_breakdowns",
-            "task_name, time_estimate, cost_estimate",
-            {"job_name": job_name}
+        # Estimate totals (EVERYTHING row when present) and actual hours, summed in Postgres
+        stats_rows = await asyncio.to_thread(
+            client.execute_rpc,
+            'get_project_overview_stats',
+            {'p_job_name': job_name}
         )
+        stats = stats_rows[0] if stats_rows else {}
+        task_count = stats.get('task_count') or 0
         
-        if not estimates:
+        if not task_count:
             return f"❌ No data found for project: {job_name}"
         
-        # Calculate totals
-        # Find EVERYTHING task for total estimate
-        everything_tasks = [e for e in estimates if 'EVERYTHING' in e.get('task_name', '').upper()]
-        if everything_tasks:
-            total_estimate = sum(e.get('time_estimate', 0) for e in everything_tasks)
-            total_cost_estimate = sum(e.get('cost_estimate', 0) for e in everything_tasks)
-        else:
-            # Sum all tasks if no EVERYTHING task
-            total_estimate = sum(e.get('time_estimate', 0) for e in estimates)
-            total_cost_estimate = sum(e.get('cost_estimate', 0) for e in estimates)
-        
-        # Get actual hours from timesheets
-        job_id_result = client.query_table("jobcodes", "id", {"name": job_name})
-        actual_hours = 0
-        
-        if job_id_result:
-            job_id = job_id_result[0].get('id')
-            timesheets = client.query_table("timesheets", "duration", {"jobcode_id": job_id})
-            total_seconds = sum(t.get('duration', 0) for t in timesheets)
-            actual_hours = total_seconds / 3600
+        total_estimate = stats.get('total_est_hours') or 0
+        total_cost_estimate = stats.get('total_est_cost') or 0
+        actual_hours = stats.get('actual_hours') or 0
         
         # Calculate metrics
         completion_pct = (actual_hours / total_estimate * 100) if total_estimate > 0 else 0
@@ -315,7 +402,7 @@ Variance: {variance:+.1f} hrs ({variance_pct:+.1f}%)
 Completion: {completion_pct:.1f}%
 
 Estimated Cost: ${total_cost_estimate:,.2f}
-Total Tasks: {len(estimates)}
+Total Tasks: {task_count}
 """
         
         return summary
@@ -335,31 +422,29 @@ async def get_project_budget_analysis(job_name: str) -> str:
         Budget analysis with tasks over/under budget
     """
     try:
-        client = DDMacAnalyticsClient()
-        
-        # Get task estimates (excluding EVERYTHING)
-        estimates = client.query_table(
-            "accubid_breakdowns",
-            "id, task_name, time_estimate, cost_estimate",
-            {"job_name": job_name}
+        client = _client()
+        
+        # Get task estimates (excluding EVERYTHING) and job ID concurrently
+        task_estimates, job_id_result = await asyncio.gather(
+            asyncio.to_thread(
+                client.query_table,
+                "accubid_breakdowns",
+                "id, task_name, time_estimate, cost_estimate",
+                {"job_name": job_name, "task_name": _EXCLUDE_EVERYTHING}
+            ),
+            asyncio.to_thread(client.query_table, "jobcodes", "id", {"name": job_name})
         )
         
-        # Filter out EVERYTHING tasks
-        task_estimates = [e for e in estimates if 'EVERYTHING' not in e.get('task_name', '').upper()]
-        
         if not task_estimates:
             return f"❌ No task data for project: {job_name}"
         
-        # Get job ID for actual hours
-        job_id_result = client.query_table("jobcodes", "id", {"name": job_name})
-        
         if not job_id_result:
             return f"⚠️ Project '{job_name}' found in estimates but not in jobcodes"
         
         job_id = job_id_result[0].get('id')
         
         # Get all timesheets for this job
-        timesheets = client.query_table("timesheets", "duration, user_id", {"jobcode_id": job_id})
+        timesheets = await asyncio.to_thread(client.query_table, "timesheets", "duration, user_id", {"jobcode_id": job_id})
         total_actual_hours = sum(t.get('duration', 0) for t in timesheets) / 3600
         total_estimate_hours = sum(t.get('time_estimate', 0) for t in task_estimates)
         
@@ -392,11 +477,12 @@ Estimated Cost: ${sum(t.get('cost_estimate', 0) for t in task_estimates):,.2f}
 
 Top Tasks by Estimate:
 """
+        parts = [summary]
         
-        for i, (task_name, estimate) in enumerate(sorted(under_budget_tasks, key=lambda x: x[1], reverse=True)[:5], 1):
-            summary += f"{i}. {task_name}: {estimate:.1f} hrs\n"
+        for i, (task_name, estimate) in enumerate(nlargest(5, under_budget_tasks, key=itemgetter(1)), 1):
+            parts.append(_BUDGET_TASK_LINE % (i, task_name, estimate))
         
-        return summary
+        return "".join(parts)
         
     except Exception as e:
         return f"❌ Error analyzing budget: {str(e)}"
@@ -410,10 +496,10 @@ async def get_all_projects_status() -> str:
         Summary of all projects with key metrics
     """
     try:
-        client = DDMacAnalyticsClient()
+        client = _client()
         
         # Get all jobs
-        jobs = client.get_job_list()
+        jobs = await asyncio.to_thread(client.get_job_list)
         
         if not jobs:
             return "❌ No projects found"
@@ -424,30 +510,58 @@ Total Projects: {len(jobs)}
 
 Projects Summary:
 """
+        parts = [summary]
+        
+        top_jobs = jobs[:15]  # Top 15 projects
+        
+        # Fetch estimates and actuals for all listed jobs in two concurrent bulk queries
+        estimates, timesheets = await asyncio.gather(
+            asyncio.to_thread(
+                client.query_table_in,
+                "accubid_breakdowns",
+                "job_name, task_name, time_estimate",
+                "job_name",
+                [job.get('name') for job in top_jobs]
+            ),
+            asyncio.to_thread(
+                client.query_table_in,
+                "timesheets",
+                "jobcode_id, duration",
+                "jobcode_id",
+                [job.get('id') for job in top_jobs]
+            )
+        )
+        
+        # Group locally: EVERYTHING rows hold the project total when present
+        all_estimates = defaultdict(float)
+        everything_estimates = defaultdict(float)
+        for e in estimates:
+            hours = e.get('time_estimate') or 0
+            all_estimates[e.get('job_name')] += hours
+            if _EVERYTHING_SEARCH(e.get('task_name') or ''):
+                everything_estimates[e.get('job_name')] += hours
         
-        for i, job in enumerate(jobs[:15], 1):  # Top 15 projects
+        seconds_by_job = defaultdict(float)
+        for t in timesheets:
+            seconds_by_job[t.get('jobcode_id')] += t.get('duration') or 0
+        
+        for i, job in enumerate(top_jobs, 1):
             job_name = job.get('name', 'Unknown')
             job_id = job.get('id')
             
-            # Get estimates for this job
-            estimates = client.query_table("accubid_breakdowns", "time_estimate", {"job_name": job_name})
-            everything_tasks = [e for e in estimates if 'EVERYTHING' in str(e.get('task_name', '')).upper()]
-            
-            if everything_tasks:
-                estimated_hours = sum(e.get('time_estimate', 0) for e in everything_tasks)
+            if job_name in everything_estimates:
+                estimated_hours = everything_estimates[job_name]
             else:
-                estimated_hours = sum(e.get('time_estimate', 0) for e in estimates)
+                estimated_hours = all_estimates.get(job_name, 0)
             
-            # Get actuals
-            timesheets = client.query_table("timesheets", "duration", {"jobcode_id": job_id})
-            actual_hours = sum(t.get('duration', 0) for t in timesheets) / 3600
+            actual_hours = seconds_by_job.get(job_id, 0) / 3600
             
             completion = (actual_hours / estimated_hours * 100) if estimated_hours > 0 else 0
             status_emoji = "🟢" if completion < 80 else "🟡" if completion < 100 else "🔴"
             
-            summary += f"{i}. {status_emoji} {job_name}: {actual_hours:.1f}/{estimated_hours:.1f} hrs ({completion:.0f}%)\n"
+            parts.append(_PROJECT_STATUS_LINE % (i, status_emoji, job_name, actual_hours, estimated_hours, completion))
         
-        return summary
+        return "".join(parts)
         
     except Exception as e:
         return f"❌ Error fetching projects status: {str(e)}"
@@ -464,37 +578,28 @@ async def get_project_team_hours(job_name: str) -> str:
         Breakdown of hours by team member
     """
     try:
-        client = DDMacAnalyticsClient()
+        client = _client()
         
         # Get job ID
-        job_id_result = client.query_table("jobcodes", "id", {"name": job_name})
+        job_id_result = await asyncio.to_thread(client.query_table, "jobcodes", "id", {"name": job_name})
         
         if not job_id_result:
             return f"❌ Project not found: {job_name}"
         
         job_id = job_id_result[0].get('id')
         
-        # Get timesheets for this job grouped by user
-        timesheets = client.query_table("timesheets", "user_id, duration", {"jobcode_id": job_id})
+        # Hours per team member, aggregated in Postgres (ordered by hours DESC)
+        team_rows = await asyncio.to_thread(client.execute_rpc, 'get_project_team_hours', {'p_jobcode_id': job_id})
         
-        if not timesheets:
+        if not team_rows:
             return f"⚠️ No time tracking data for project: {job_name}"
         
-        # Group by user
-        user_hours = {}
-        for ts in timesheets:
-            user_id = ts.get('user_id')
-            duration = ts.get('duration', 0) / 3600  # Convert to hours
-            user_hours[user_id] = user_hours.get(user_id, 0) + duration
-        
-        # Get user names
-        users = client.query_table("users", "id, username")
-        user_map = {u.get('id'): u.get('username', 'Unknown') for u in users}
+        sorted_users = [
+            (row.get('username') or f"User {row.get('user_id')}", (row.get('total_seconds') or 0) / 3600)
+            for row in team_rows
+        ]
         
-        # Sort by hours
-        sorted_users = sorted(user_hours.items(), key=lambda x: x[1], reverse=True)
-        
-        total_hours = sum(user_hours.values())
+        total_hours = sum(hours for _, hours in sorted_users)
         
         summary = f"""Team Hours - {job_name}
 
@@ -503,13 +608,13 @@ Team Members: {len(sorted_users)}
 
 Hours by Team Member:
 """
+        parts = [summary]
         
-        for i, (user_id, hours) in enumerate(sorted_users, 1):
-            username = user_map.get(user_id, f'User {user_id}')
+        for i, (username, hours) in enumerate(sorted_users, 1):
             pct = (hours / total_hours * 100) if total_hours > 0 else 0
-            summary += f"{i}. {username}: {hours:.1f} hrs ({pct:.1f}%)\n"
+            parts.append(_TEAM_MEMBER_LINE % (i, username, hours, pct))
         
-        return summary
+        return "".join(parts)
         
     except Exception as e:
         return f"❌ Error fetching team hours: {str(e)}"
@@ -530,10 +635,11 @@ async def get_task_variance_analysis(job_name: str) -> str:
         Variance analysis showing tasks over/under budget
     """
     try:
-        client = DDMacAnalyticsClient()
+        client = _client()
         
         # Get task summary using RPC
-        result = client.execute_rpc(
+        result = await asyncio.to_thread(
+            client.execute_rpc,
             'get_accubid_task_summary',
             {
                 'p_limit': 100,
@@ -548,35 +654,25 @@ async def get_task_variance_analysis(job_name: str) -> str:
             return f"❌ No task data for project: {job_name}"
         
         # Filter out EVERYTHING tasks
-        tasks = [t for t in result if 'EVERYTHING' not in t.get('task_name', '').upper()]
+        tasks = _without_everything(result)
         
         if not tasks:
             return f"⚠️ No individual tasks found for: {job_name}"
         
-        # Calculate variances
-        task_variances = []
+        # Calculate variances for all tasks at once
+        names = [task.get('task_name', 'Unknown') for task in tasks]
+        estimates, actuals = _task_hours(tasks)
         
-        for task in tasks:
-            task_name = task.get('task_name', 'Unknown')
-            estimate = task.get('time_estimate', 0)
-            actual = task.get('duration_hours', 0)
-            
-            variance = actual - estimate
-            variance_pct = (variance / estimate * 100) if estimate > 0 else 0
-            
-            task_variances.append({
-                'name': task_name,
-                'estimate': estimate,
-                'actual': actual,
-                'variance': variance,
-                'variance_pct': variance_pct
-            })
+        variances = actuals - estimates
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance_pcts = np.where(estimates > 0, variances / estimates * 100, 0.0)
         
-        # Sort by absolute variance
-        sorted_tasks = sorted(task_variances, key=lambda x: abs(x['variance']), reverse=True)
+        over_budget = np.flatnonzero(variances > 0)
+        under_budget = np.flatnonzero(variances < 0)
         
-        over_budget = [t for t in sorted_tasks if t['variance'] > 0]
-        under_budget = [t for t in sorted_tasks if t['variance'] < 0]
+        # Largest absolute variances on each side
+        top_over_budget = over_budget[np.argsort(-variances[over_budget], kind='stable')[:5]]
+        top_under_budget = under_budget[np.argsort(variances[under_budget], kind='stable')[:5]]
         
         summary = f"""Task Variance Analysis - {job_name}
 
@@ -586,16 +682,17 @@ Under Budget Tasks: {len(under_budget)}
 
 Top Tasks Over Budget:
 """
+        parts = [summary]
         
-        for i, task in enumerate(over_budget[:5], 1):
-            summary += f"{i}. {task['name']}: +{task['variance']:.1f} hrs ({task['variance_pct']:+.1f}%)\n"
+        for i, j in enumerate(top_over_budget, 1):
+            parts.append(_OVER_BUDGET_LINE % (i, names[j], variances[j], variance_pcts[j]))
         
-        summary += "\nTop Tasks Under Budget:\n"
+        parts.append("\nTop Tasks Under Budget:\n")
         
-        for i, task in enumerate(under_budget[:5], 1):
-            summary += f"{i}. {task['name']}: {task['variance']:.1f} hrs ({task['variance_pct']:.1f}%)\n"
+        for i, j in enumerate(top_under_budget, 1):
+            parts.append(_UNDER_BUDGET_LINE % (i, names[j], variances[j], variance_pcts[j]))
         
-        return summary
+        return "".join(parts)
         
     except Exception as e:
         return f"❌ Error analyzing task variance: {str(e)}"
@@ -612,18 +709,16 @@ async def get_task_progress_status(job_name: str) -> str:
         Task progress comparison with foreman vs actual completion
     """
     try:
-        client = DDMacAnalyticsClient()
+        client = _client()
         
         # Get tasks for this job
-        tasks = client.query_table(
+        tasks = await asyncio.to_thread(
+            client.query_table,
             "accubid_breakdowns",
             "id, task_name, time_estimate",
-            {"job_name": job_name}
+            {"job_name": job_name, "task_name": _EXCLUDE_EVERYTHING}
         )
         
-        # Filter out EVERYTHING
-        tasks = [t for t in tasks if 'EVERYTHING' not in t.get('task_name', '').upper()]
-        
         if not tasks:
             return f"❌ No tasks found for project: {job_name}"
         
@@ -632,26 +727,31 @@ async def get_task_progress_status(job_name: str) -> str:
 Total Tasks: {len(tasks)}
 
 """
+        parts = [summary]
         
         tasks_with_progress = 0
+        top_tasks = tasks[:15]  # Top 15 tasks
+        
+        # Get latest foreman progress for all listed tasks in one RPC
+        progress_map = await asyncio.to_thread(
+            client.get_latest_task_progress_bulk,
+            [task.get('id') for task in top_tasks]
+        )
         
-        for task in tasks[:15]:  # Top 15 tasks
-            task_id = task.get('id')
+        for task in top_tasks:
             task_name = task.get('task_name', 'Unknown')
-            
-            # Get latest foreman progress
-            progress = client.get_latest_task_progress(task_id)
+            progress = progress_map.get(task.get('id'))
             
             if progress is not None:
                 tasks_with_progress += 1
                 status = "🟢" if progress >= 75 else "🟡" if progress >= 50 else "🔴"
-                summary += f"{status} {task_name}: {progress:.0f}% complete\n"
+                parts.append(_TASK_PROGRESS_LINE % (status, task_name, progress))
             else:
-                summary += f"⚪ {task_name}: No progress reported\n"
+                parts.append(_TASK_NO_PROGRESS_LINE % task_name)
         
-        summary += f"\nTasks with Progress Updates: {tasks_with_progress}/{len(tasks)}"
+        parts.append(f"\nTasks with Progress Updates: {tasks_with_progress}/{len(tasks)}")
         
-        return summary
+        return "".join(parts)
         
     except Exception as e:
         return f"❌ Error fetching task progress: {str(e)}"
@@ -673,18 +773,26 @@ async def update_foreman_task_progress(task_id: int, progress_percent: float) ->
         if not 0 <= progress_percent <= 100:
             return f"❌ Invalid progress: {progress_percent}. Must be between 0-100"
         
-        client = DDMacAnalyticsClient()
-        
-        # Get task details
-        task_result = client.query_table("accubid_breakdowns", "task_name, job_name", filters={"id": task_id})
+        client = _client()
+        
+        try:
+            # Validate the task and insert the update in one RPC round-trip
+            result = await asyncio.to_thread(
+                client.upsert_task_progress_bulk,
+                [{"task_id": task_id, "progress": progress_percent}]
+            )
+        except RPCNotFoundError:
+            # Function not deployed yet: look up the task, then insert the update
+            result = await asyncio.to_thread(
+                client.query_table, "accubid_breakdowns", "task_name, job_name", {"id": task_id}
+            )
+            if result:
+                await asyncio.to_thread(client.insert_task_progress, task_id, progress_percent)
         
-        if not task_result:
+        if not result:
             return f"❌ Task ID {task_id} not found"
         
-        task_info = task_result[0]
-        
-        # Insert progress update
-        result = client.insert_task_progress(task_id, progress_percent)
+        task_info = result[0]
         
         return f"""✅ Foreman Progress Updated
 
@@ -697,6 +805,53 @@ Updated: Successfully recorded
     except Exception as e:
         return f"❌ Error updating progress: {str(e)}"
 
+@function_tool
+async def update_foreman_task_progress_bulk(updates: List[TaskProgressUpdate]) -> str:
+    """
+    Update foreman progress for several tasks at once.
+    
+    Prefer this over update_foreman_task_progress when updating more than one task.
+    
+    Args:
+        updates: List of {task_id, progress_percent} pairs, progress 0-100 (required)
+    
+    Returns:
+        Confirmation of recorded updates and any task IDs that were not found
+    """
+    try:
+        if not updates:
+            return "❌ At least one progress update is required"
+        
+        # Validate every entry before writing anything
+        for update in updates:
+            if not 0 <= update.progress_percent <= 100:
+                return f"❌ Invalid progress for task {update.task_id}: {update.progress_percent}. Must be between 0-100"
+        
+        client = _client()
+        
+        result = await asyncio.to_thread(
+            client.upsert_task_progress_bulk,
+            [{"task_id": u.task_id, "progress": u.progress_percent} for u in updates]
+        )
+        
+        parts = [f"✅ Foreman Progress Updated ({len(result)}/{len(updates)} tasks)\n\n"]
+        
+        for task_info in result:
+            parts.append(
+                f"- {task_info.get('task_name', 'Unknown')} "
+                f"({task_info.get('job_name', 'Unknown')}): {task_info.get('progress', 0):.0f}%\n"
+            )
+        
+        recorded_ids = {task_info.get('task_id') for task_info in result}
+        missing = [str(u.task_id) for u in updates if u.task_id not in recorded_ids]
+        if missing:
+            parts.append(f"\n❌ Task IDs not found: {', '.join(missing)}")
+        
+        return "".join(parts)
+        
+    except Exception as e:
+        return f"❌ Error updating progress: {str(e)}"
+
 @function_tool
 async def get_task_efficiency_summary(job_name: str) -> str:
     """
@@ -709,10 +864,11 @@ async def get_task_efficiency_summary(job_name: str) -> str:
         Efficiency summary with task performance ratings
     """
     try:
-        client = DDMacAnalyticsClient()
+        client = _client()
         
         # Get task data
-        result = client.execute_rpc(
+        result = await asyncio.to_thread(
+            client.execute_rpc,
             'get_accubid_task_summary',
             {
                 'p_limit': 100,
@@ -724,48 +880,28 @@ async def get_task_efficiency_summary(job_name: str) -> str:
         )
         
         # Filter out EVERYTHING tasks
-        tasks = [t for t in result if 'EVERYTHING' not in t.get('task_name', '').upper()]
+        tasks = _without_everything(result)
         
         if not tasks:
             return f"❌ No task data for: {job_name}"
         
-        # Calculate efficiency for each task
-        task_efficiency = []
+        # Calculate efficiency for all tasks at once
+        names = [task.get('task_name', 'Unknown') for task in tasks]
+        estimates, actuals = _task_hours(tasks)
         
-        for task in tasks:
-            task_name = task.get('task_name', 'Unknown')
-            estimate = task.get('time_estimate', 0)
-            actual = task.get('duration_hours', 0)
-            
-            efficiency = (estimate / actual * 100) if actual > 0 else 0
-            
-            # Categorize
-            if efficiency >= 90:
-                category = "Excellent"
-                emoji = "🌟"
-            elif efficiency >= 75:
-                category = "Good"
-                emoji = "✅"
-            elif efficiency >= 60:
-                category = "Fair"
-                emoji = "⚠️"
-            else:
-                category = "Poor"
-                emoji = "🔴"
-            
-            task_efficiency.append({
-                'name': task_name,
-                'estimate': estimate,
-                'actual': actual,
-                'efficiency': efficiency,
-                'category': category,
-                'emoji': emoji
-            })
+        with np.errstate(divide='ignore', invalid='ignore'):
+            efficiencies = np.where(actuals > 0, estimates / actuals * 100, 0.0)
+        
+        # Categorize (bin index into _EFFICIENCY_CATEGORIES)
+        categories = np.digitize(efficiencies, _EFFICIENCY_BINS)
         
-        # Sort by efficiency
-        sorted_tasks = sorted(task_efficiency, key=lambda x: x['efficiency'], reverse=True)
+        # Most and least efficient tasks: the two ends of one stable descending
+        # sort, so ties resolve as sorted(..., reverse=True)[:5] / [-5:][::-1]
+        by_efficiency = np.argsort(-efficiencies, kind='stable')
+        most_efficient = by_efficiency[:5]
+        least_efficient = by_efficiency[::-1][:5]
         
-        avg_efficiency = sum(t['efficiency'] for t in task_efficiency) / len(task_efficiency) if task_efficiency else 0
+        avg_efficiency = efficiencies.mean()
         
         summary = f"""Task Efficiency Summary - {job_name}
 
@@ -774,16 +910,19 @@ Total Tasks: {len(tasks)}
 
 Top Efficient Tasks:
 """
+        parts = [summary]
         
-        for i, task in enumerate(sorted_tasks[:5], 1):
-            summary += f"{i}. {task['emoji']} {task['name']}: {task['efficiency']:.1f}% ({task['category']})\n"
+        for i, j in enumerate(most_efficient, 1):
+            category, emoji = _EFFICIENCY_CATEGORIES[categories[j]]
+            parts.append(_EFFICIENCY_LINE % (i, emoji, names[j], efficiencies[j], category))
         
-        summary += "\nLeast Efficient Tasks:\n"
+        parts.append("\nLeast Efficient Tasks:\n")
         
-        for i, task in enumerate(sorted_tasks[-5:][::-1], 1):
-            summary += f"{i}. {task['emoji']} {task['name']}: {task['efficiency']:.1f}% ({task['category']})\n"
+        for i, j in enumerate(least_efficient, 1):
+            category, emoji = _EFFICIENCY_CATEGORIES[categories[j]]
+            parts.append(_EFFICIENCY_LINE % (i, emoji, names[j], efficiencies[j], category))
         
-        return summary
+        return "".join(parts)
         
     except Exception as e:
         return f"❌ Error calculating efficiency: {str(e)}"
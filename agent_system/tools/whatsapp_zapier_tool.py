@@ -3,17 +3,166 @@ Custom WhatsApp tool using Zapier webhook
 Follows OpenAI Agents SDK custom tool pattern
 """
 from agents import function_tool
-import requests
+import asyncio
+import httpx
+import logging
+import orjson
 import os
+import re
+import threading
+import time
 from dotenv import load_dotenv
+from functools import lru_cache
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, List, Optional
 
-load_dotenv()
+from utils.event_loop import add_loop_cleanup
 
-# Zapier webhook URL for WhatsApp
-ZAPIER_WEBHOOK_URL = os.getenv(
-    "ZAPIER_WHATSAPP_WEBHOOK",
-    "https://hooks.zapier.com/hooks/catch/your_webhook_id/"
-)
+# Debug output is dropped by the logging level check unless DEBUG is enabled
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def _load_env():
+    """Parse .env once, on first use rather than at import"""
+    load_dotenv()
+
+def _webhook_url() -> str:
+    """Zapier webhook URL for WhatsApp (read per call so runtime overrides apply)"""
+    _load_env()
+    return os.getenv(
+        "ZAPIER_WHATSAPP_WEBHOOK",
+        "https://hooks.zapier.com/hooks/catch/your_webhook_id/"
+    )
+
+def batch_webhook_configured() -> bool:
+    """Whether a batch webhook is set (send_whatsapp_batch is only offered then)"""
+    _load_env()
+    return bool(os.getenv("ZAPIER_WHATSAPP_BATCH_WEBHOOK"))
+
+def _batch_webhook_url() -> str:
+    """Zapier webhook URL for batched WhatsApp sends (Zap iterates the "batch" array)"""
+    _load_env()
+    return os.getenv(
+        "ZAPIER_WHATSAPP_BATCH_WEBHOOK",
+        "https://hooks.zapier.com/hooks/catch/your_batch_webhook_id/"
+    )
+
+# Pooled async HTTP clients, one per event loop (an AsyncClient is bound to
+# the loop it first ran on); each is closed when run_sync closes its loop
+_http_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+_http_clients_lock = threading.Lock()
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Get the keep-alive HTTP client for the current event loop"""
+    loop = asyncio.get_running_loop()
+    with _http_clients_lock:
+        client = _http_clients.get(loop)
+        if client is not None:
+            return client
+        # Drop clients left behind by loops that closed without cleanup
+        for stale in [l for l in _http_clients if l.is_closed()]:
+            del _http_clients[stale]
+        client = httpx.AsyncClient(
+            # Short connect timeout so an unreachable Zapier fails fast
+            timeout=httpx.Timeout(15.0, connect=3.0),
+            headers={'Content-Type': 'application/json'},
+            # Sends are sparse; keep the TLS connection longer than httpx's 5s default
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+        )
+        _http_clients[loop] = client
+    add_loop_cleanup(_close_http_client)
+    return client
+
+async def _close_http_client():
+    """Close the current loop's HTTP client and its pooled connections"""
+    with _http_clients_lock:
+        client = _http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+# Refused/unresolvable connections fail fast and never reached Zapier, so
+# they are safe to retry; connect timeouts are not retried (each one already
+# cost the full connect timeout) and timeouts after sending may be delivered
+_CONNECT_RETRIES = 2
+_RETRY_BACKOFF_SECONDS = 0.5
+
+# Circuit breaker: after repeated webhook failures, fail fast for a cool-off
+# window instead of paying the full timeout on every call
+_CIRCUIT_FAILURE_THRESHOLD = 5
+_CIRCUIT_COOLDOWN_SECONDS = 30.0
+_circuit = {'failures': 0, 'open_until': 0.0}
+_circuit_lock = threading.Lock()  # sends run on several request threads
+
+def _circuit_open() -> bool:
+    """Whether webhook calls are currently short-circuited"""
+    with _circuit_lock:
+        return time.monotonic() < _circuit['open_until']
+
+def _record_webhook_result(ok: bool):
+    """Track consecutive webhook failures and trip the circuit at the threshold"""
+    with _circuit_lock:
+        if ok:
+            _circuit['failures'] = 0
+            return
+        _circuit['failures'] += 1
+        if _circuit['failures'] < _CIRCUIT_FAILURE_THRESHOLD:
+            return
+        _circuit['open_until'] = time.monotonic() + _CIRCUIT_COOLDOWN_SECONDS
+        _circuit['failures'] = 0
+    logger.warning("[WhatsApp Tool] ⚠️ Zapier webhook failing, pausing sends for %.0fs", _CIRCUIT_COOLDOWN_SECONDS)
+
+async def _post_webhook(url: str, payload: dict) -> httpx.Response:
+    """
+    POST a payload to a Zapier webhook
+    
+    Retries with exponential backoff when the connection is refused, and feeds the outcome into the circuit breaker.
+    
+    Returns:
+        The webhook response
+    """
+    for attempt in range(_CONNECT_RETRIES + 1):
+        try:
+            response = await _get_http_client().post(url, json=payload)
+        except httpx.ConnectError:
+            if attempt < _CONNECT_RETRIES:
+                await asyncio.sleep(_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+                continue
+            _record_webhook_result(False)
+            raise
+        except httpx.TimeoutException:
+            _record_webhook_result(False)
+            raise
+        
+        _record_webhook_result(response.status_code < 500)
+        return response
+
+# International format: + followed by country code and number (10-15 digits)
+_PHONE_NUMBER_RE = re.compile(r'\+\d{10,15}')
+
+class WhatsAppMessage(BaseModel):
+    """Single recipient/message pair for batched sends"""
+    model_config = ConfigDict(str_strip_whitespace=True)
+    
+    phone_number: str
+    message: str
+
+def _validate_whatsapp_input(phone_number: str, message: str) -> Optional[str]:
+    """
+    Validate phone number and message content
+    
+    Returns:
+        Error message, or None if the input is valid
+    """
+    if not phone_number:
+        return "❌ Error: Phone number is required"
+    
+    if not _PHONE_NUMBER_RE.fullmatch(phone_number):
+        return f"❌ Error: Phone number must be + followed by country code and number (10-15 digits, no spaces). Received: {phone_number}. Please provide it like +919932270002"
+    
+    if not message:
+        return "❌ Error: Message content is required"
+    
+    return None
 
 @function_tool
 async def send_whatsapp_via_zapier(phone_number: str, message: str) -> str:
@@ -43,21 +192,16 @@ async def send_whatsapp_via_zapier(phone_number: str, message: str) -> str:
         Status message with delivery confirmation or error details
     """
     # Validate phone number format
-    if not phone_number:
-        return "❌ Error: Phone number is required"
-    
-    if not phone_number.startswith('+'):
-        return f"❌ Error: Phone number must start with + for international format. Received: {phone_number}. Please provide with + prefix (e.g., +919932270002)"
+    error = _validate_whatsapp_input(phone_number, message)
+    if error:
+        return error
     
-    if len(phone_number) < 11:
-        return f"❌ Error: Phone number too short (minimum 11 characters with country code). Received: {phone_number}"
-    
-    if not message:
-        return "❌ Error: Message content is required"
+    if _circuit_open():
+        return "⏳ Zapier webhook is temporarily unavailable after repeated failures. The message was not sent; please try again in a minute."
     
     # Log attempt (for debugging)
-    print(f"[WhatsApp Tool] Sending to {phone_number} via Zapier webhook...")
-    print(f"[WhatsApp Tool] Message length: {len(message)} characters")
+    logger.debug("[WhatsApp Tool] Sending to %s via Zapier webhook...", phone_number)
+    logger.debug("[WhatsApp Tool] Message length: %d characters", len(message))
     
     # Prepare Zapier payload
     payload = {
@@ -66,34 +210,34 @@ async def send_whatsapp_via_zapier(phone_number: str, message: str) -> str:
     }
     
     try:
-        # Send POST request to Zapier webhook
-        response = requests.post(
-            ZAPIER_WEBHOOK_URL,
-            json=payload,
-            timeout=15,
-            headers={'Content-Type': 'application/json'}
-        )
+        # Send POST request to Zapier webhook (non-blocking, pooled connection)
+        response = await _post_webhook(_webhook_url(), payload)
         
-        print(f"[WhatsApp Tool] Zapier response status: {response.status_code}")
+        logger.debug("[WhatsApp Tool] Zapier response status: %s", response.status_code)
         
         # Check response status
         if response.status_code == 200:
-            try:
-                # Try to parse JSON response
-                response_data = response.json()
-                
+            # Only parse the body when Zapier says it is JSON
+            response_data = None
+            if 'application/json' in response.headers.get('Content-Type', ''):
+                try:
+                    response_data = orjson.loads(response.content)
+                except orjson.JSONDecodeError:
+                    response_data = None
+            
+            if isinstance(response_data, dict):
                 if response_data.get('status') == 'success':
                     request_id = response_data.get('id', 'N/A')
-                    print(f"[WhatsApp Tool] ✅ Success! Request ID: {request_id}")
+                    logger.debug("[WhatsApp Tool] ✅ Success! Request ID: %s", request_id)
                     return f"✅ WhatsApp message sent successfully to {phone_number}. Zapier request ID: {request_id}. The message has been delivered through the Zapier webhook."
                 else:
-                    print(f"[WhatsApp Tool] ⚠️ Unclear status: {response_data}")
+                    logger.warning("[WhatsApp Tool] ⚠️ Unclear status: %s", response_data)
                     return f"⚠️ Zapier webhook received the request but returned unclear status: {response_data}. The message may still be delivered."
             
-            except ValueError:
+            else:
                 # Response is not JSON (Zapier might return plain text on success)
                 response_text = response.text[:200]
-                print(f"[WhatsApp Tool] ✅ Non-JSON response: {response_text}")
+                logger.debug("[WhatsApp Tool] ✅ Non-JSON response: %s", response_text)
                 return f"✅ WhatsApp message sent to {phone_number}. Zapier acknowledged request. Response: {response_text}"
         
         elif response.status_code == 202:
@@ -103,18 +247,79 @@ async def send_whatsapp_via_zapier(phone_number: str, message: str) -> str:
         else:
             # Error status code
             error_text = response.text[:200] if response.text else "No error message"
-            print(f"[WhatsApp Tool] ❌ Failed with status {response.status_code}")
+            logger.warning("[WhatsApp Tool] ❌ Failed with status %s", response.status_code)
             return f"❌ Zapier webhook failed with status code {response.status_code}. Error: {error_text}"
     
-    except requests.exceptions.Timeout:
-        print(f"[WhatsApp Tool] ⏳ Request timed out")
-        return f"⏳ Request to Zapier webhook timed out after 15 seconds. The message may still be processing in the background and could be delivered."
+    except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+        # Checked before TimeoutException: a connect timeout means nothing was sent
+        logger.warning("[WhatsApp Tool] ❌ Connection error: %s", e)
+        return f"❌ Could not connect to Zapier webhook. The message was NOT sent. Please check internet connection and webhook URL. Error: {str(e)}"
     
-    except requests.exceptions.ConnectionError as e:
-        print(f"[WhatsApp Tool] ❌ Connection error: {str(e)}")
-        return f"❌ Could not connect to Zapier webhook. Please check internet connection and webhook URL. Error: {str(e)}"
+    except httpx.TimeoutException:
+        logger.warning("[WhatsApp Tool] ⏳ Request timed out")
+        return f"⏳ Request to Zapier webhook timed out after 15 seconds. The message may still be processing in the background and could be delivered."
     
     except Exception as e:
-        print(f"[WhatsApp Tool] ❌ Unexpected error: {str(e)}")
+        logger.error("[WhatsApp Tool] ❌ Unexpected error: %s", e)
         return f"❌ Unexpected error calling Zapier webhook: {str(e)}"
 
+@function_tool
+async def send_whatsapp_batch(messages: List[WhatsAppMessage]) -> str:
+    """
+    Send several WhatsApp messages in a single Zapier webhook call.
+    
+    Prefer this over send_whatsapp_via_zapier when notifying more than one recipient.
+    Every phone number MUST include the + prefix and country code (e.g., +919932270002).
+    
+    Args:
+        messages: List of {phone_number, message} pairs to deliver (required)
+    
+    Returns:
+        Status message with delivery confirmation or error details
+    """
+    if not messages:
+        return "❌ Error: At least one message is required"
+    
+    # Validate every entry before sending anything
+    for entry in messages:
+        error = _validate_whatsapp_input(entry.phone_number, entry.message)
+        if error:
+            return error
+    
+    if _circuit_open():
+        return "⏳ Zapier webhook is temporarily unavailable after repeated failures. The messages were not sent; please try again in a minute."
+    
+    logger.debug("[WhatsApp Tool] Sending batch of %d messages via Zapier webhook...", len(messages))
+    
+    payload = {
+        'batch': [
+            {'phone_number': entry.phone_number, 'message': entry.message}
+            for entry in messages
+        ]
+    }
+    
+    try:
+        response = await _post_webhook(_batch_webhook_url(), payload)
+        
+        logger.debug("[WhatsApp Tool] Zapier batch response status: %s", response.status_code)
+        
+        if response.status_code in (200, 202):
+            recipients = ", ".join(entry.phone_number for entry in messages)
+            return f"✅ WhatsApp batch of {len(messages)} messages accepted by Zapier for delivery to: {recipients}"
+        
+        error_text = response.text[:200] if response.text else "No error message"
+        logger.warning("[WhatsApp Tool] ❌ Batch failed with status %s", response.status_code)
+        return f"❌ Zapier batch webhook failed with status code {response.status_code}. Error: {error_text}"
+    
+    except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+        # Checked before TimeoutException: a connect timeout means nothing was sent
+        logger.warning("[WhatsApp Tool] ❌ Connection error: %s", e)
+        return f"❌ Could not connect to Zapier batch webhook. The messages were NOT sent. Please check internet connection and webhook URL. Error: {str(e)}"
+    
+    except httpx.TimeoutException:
+        logger.warning("[WhatsApp Tool] ⏳ Batch request timed out")
+        return f"⏳ Batch request to Zapier webhook timed out after 15 seconds. The messages may still be processing in the background and could be delivered."
+    
+    except Exception as e:
+        logger.error("[WhatsApp Tool] ❌ Unexpected error: %s", e)
+        return f"❌ Unexpected error calling Zapier batch webhook: {str(e)}"
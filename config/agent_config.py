@@ -2,30 +2,37 @@
 Agent Optimization Configuration
 Centralized profiles for model, reasoning, and verbosity settings
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import MappingProxyType
 from openai.types.shared import Reasoning
 from agents import ModelSettings
 from typing import Optional
 
 
-@dataclass
+@dataclass(frozen=True)
 class AgentOptimizationProfile:
-    """Optimization profile for an agent"""
+    """Optimization profile for an agent (immutable, so it can be cached)"""
     model: str
     reasoning_effort: str  # "minimal", "low", "medium", "high"
     verbosity: str  # "low", "medium", "high"
     max_turns: int
+    # Derived once at construction; read this instead of rebuilding settings
+    model_settings: ModelSettings = field(init=False, repr=False, compare=False)
     
-    def to_model_settings(self) -> ModelSettings:
-        """Convert to ModelSettings object with Reasoning"""
-        return ModelSettings(
+    def __post_init__(self):
+        object.__setattr__(self, "model_settings", ModelSettings(
             reasoning=Reasoning(effort=self.reasoning_effort),
             verbosity=self.verbosity
-        )
+        ))
+    
+    def to_model_settings(self) -> ModelSettings:
+        """Convert to ModelSettings object with Reasoning (precomputed)"""
+        return self.model_settings
 
 
-# Pre-defined profiles for different agent types
-AGENT_PROFILES = {
+# Pre-defined profiles for different agent types (read-only)
+AGENT_PROFILES = MappingProxyType({
     # ============================================================
     # MEMORY AGENT SUB-AGENTS (fast classification)
     # ============================================================
@@ -114,14 +121,14 @@ AGENT_PROFILES = {
         verbosity="medium",          # Detailed task breakdowns
         max_turns=5
     ),
-}
+})
 
 
 # ============================================================
 # DYNAMIC ORCHESTRATOR PROFILES (based on task complexity)
 # ============================================================
 
-ORCHESTRATOR_PROFILES = {
+ORCHESTRATOR_PROFILES = MappingProxyType({
     "SIMPLE": AgentOptimizationProfile(
         model="gpt-5.1",
         reasoning_effort="minimal",  # Quick decisions
@@ -142,9 +149,10 @@ ORCHESTRATOR_PROFILES = {
         verbosity="medium",          # Detailed responses
         max_turns=45
     ),
-}
+})
 
 
+@lru_cache(maxsize=32)
 def get_agent_profile(agent_type: str) -> AgentOptimizationProfile:
     """
     Get optimization profile for an agent type
@@ -158,6 +166,7 @@ def get_agent_profile(agent_type: str) -> AgentOptimizationProfile:
     return AGENT_PROFILES.get(agent_type, AGENT_PROFILES["email"])
 
 
+@lru_cache(maxsize=32)
 def get_orchestrator_profile(complexity: str) -> AgentOptimizationProfile:
     """
     Get dynamic orchestrator profile based on task complexity
@@ -1,19 +1,26 @@
 import os
 import sys
 import asyncio
+from functools import lru_cache
 from typing import Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from utils.supabase_client import SupabaseClient
 from utils.logger import AgentLogger
-from utils.whatsapp_helper import extract_phone_number, format_whatsapp_confirmation, mask_phone_number
+from utils.event_loop import run_sync
+from utils.whatsapp_helper import extract_phone_number, format_whatsapp_confirmation, build_whatsapp_task, mask_phone_number
 from agent_system.memory_agent import MemoryAgent
 from agent_system.orchestrator_agent import OrchestratorAgent
 from agent_system.subagents.whatsapp_agent import WhatsAppAgent
 
+@lru_cache(maxsize=1)
+def _get_supabase_client() -> SupabaseClient:
+    """Shared Supabase client (its HTTP session is reused across requests)"""
+    return SupabaseClient()
+
 async def process_request_async(json_input: Dict[str, Any], run_id: str = None) -> Dict[str, Any]:
     """
     Main async orchestrator function to process incoming requests through the agent pipeline
@@ -29,15 +36,16 @@ async def process_request_async(json_input: Dict[str, Any], run_id: str = None)
     # Initialize logger
     logger = AgentLogger(run_id)
     logger.log("=== STARTING REQUEST PROCESSING (DIDDYMAC - AGENTS SDK + GPT-5) ===")
-    logger.log(f"Input: {json_input}")
+    # Full payload goes to the log file only (also saved as JSON below)
+    logger.log("Input: %s", "DEBUG", json_input)
     
     # Save original input
     logger.save_json("input.json", json_input)
     
     try:
-        # Initialize Supabase client
-        supabase = SupabaseClient()
-        logger.log("Supabase client initialized")
+        # Shared Supabase client (built on first request)
+        supabase = _get_supabase_client()
+        logger.log("Supabase client ready")
         
         # Extract fields from input
         user = json_input.get("user")
@@ -45,19 +53,40 @@ async def process_request_async(json_input: Dict[str, Any], run_id: str = None)
         input_text = json_input.get("input")
         subject = json_input.get("subject")
         
-        # Insert into input_db
-        logger.log("Inserting input into database...")
-        inserted_record = supabase.insert_input(user, source, input_text, subject)
+        # Insert into input_db and fetch message history concurrently; history
+        # is cut off at the time the request arrived, which precedes the
+        # created_at the database assigns to the new record as long as the app
+        # server's clock is not ahead of the database's
+        logger.log("Inserting input and fetching message history...")
+        received_at = datetime.now(timezone.utc).isoformat()
+        inserted_record, message_history = await asyncio.gather(
+            asyncio.to_thread(supabase.insert_input, user, source, input_text, subject),
+            asyncio.to_thread(
+                supabase.get_message_history,
+                user=user,
+                source=source,
+                subject=subject,
+                current_created_at=received_at
+            )
+        )
         logger.log(f"Input stored with ID: {inserted_record.get('id')}")
         
-        # Get message history
-        logger.log("Fetching message history...")
-        message_history = supabase.get_message_history(
-            user=user,
-            source=source,
-            subject=subject,
-            current_created_at=inserted_record.get("created_at")
-        )
+        # Clock skew guard: if the new record came back as its own history,
+        # refetch with the created_at the database actually assigned
+        created_at = inserted_record.get("created_at")
+        if created_at and any(
+            row.get("created_at") == created_at
+            for rows in message_history.values()
+            for row in rows
+        ):
+            logger.log("Current message returned as history (clock skew), refetching...", "WARNING")
+            message_history = await asyncio.to_thread(
+                supabase.get_message_history,
+                user=user,
+                source=source,
+                subject=subject,
+                current_created_at=created_at
+            )
         logger.log(f"Message history fetched")
         
         # Build input_body
@@ -120,12 +149,13 @@ async def process_request_async(json_input: Dict[str, Any], run_id: str = None)
             
             # Check source and send response via appropriate channel
             source = input_body["current_message_input"].get("source", "")
+            channel = (source or "").lower()
             whatsapp_sent = False
             whatsapp_details = None
             email_sent = False
             email_details = None
             
-            if source.lower() == "whatsapp":
+            if channel == "whatsapp":
                 logger.log("\n=== WHATSAPP CONFIRMATION ===")
                 logger.log("Source is WhatsApp - sending confirmation message...")
                 
@@ -148,18 +178,10 @@ async def process_request_async(json_input: Dict[str, Any], run_id: str = None)
                         logger.save_text("whatsapp_confirmation.txt", confirmation_msg)
                         
                         # Send via WhatsApp Agent
-                        whatsapp_agent = WhatsAppAgent(logger)
+                        whatsapp_agent = WhatsAppAgent.get_instance(logger)
                         
                         # Build explicit task for WhatsApp agent with phone format emphasis
-                        whatsapp_task = f"""Send this WhatsApp confirmation message.
-
-CRITICAL: Use the phone number EXACTLY as provided with the + prefix for international format.
-Phone number (with + prefix): {phone_number}
-
-Message to send:
-{confirmation_msg}
-
-IMPORTANT: The phone number {phone_number} already includes the + prefix and country code. Use it EXACTLY as shown."""
+                        whatsapp_task = build_whatsapp_task(phone_number, confirmation_msg)
                         
                         # Use async run method with increased turns
                         whatsapp_run_result = await whatsapp_agent.run(whatsapp_task, max_turns=10)
@@ -197,7 +219,7 @@ IMPORTANT: The phone number {phone_number} already includes the + prefix and cou
                         "reason": "no_phone_number"
                     }
             
-            elif source.lower() == "email":
+            elif channel == "email":
                 logger.log("\n=== EMAIL RESPONSE ===")
                 logger.log("Source is Email - sending response via email...")
                 
@@ -230,7 +252,7 @@ This is an automated response from DiddyMac AI Agent System.
                         logger.save_text("email_response.txt", email_body)
                         
                         # Send via Email Agent
-                        email_agent = EmailAgent(logger)
+                        email_agent = EmailAgent.get_instance(logger)
                         
                         email_task = f"""Send this email response.
 
@@ -313,12 +335,7 @@ Send the email now."""
             return result
     
     except Exception as e:
-        error_msg = f"Error in main orchestrator: {str(e)}"
-        logger.log(error_msg, "ERROR")
-        logger.log(f"Exception details: {type(e).__name__}", "ERROR")
-        
-        import traceback
-        logger.log(f"Traceback:\n{traceback.format_exc()}", "ERROR")
+        logger.exception("Error in main orchestrator (%s): %s", type(e).__name__, e)
         
         result = {
             "status": "error",
@@ -341,7 +358,7 @@ def process_request(json_input: Dict[str, Any], run_id: str = None) -> Dict[str,
     Returns:
         Dictionary with processing results
     """
-    return asyncio.run(process_request_async(json_input, run_id))
+    return run_sync(process_request_async(json_input, run_id))
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,104 @@
+-- DDMac Analytics database functions called by the analytics tools
+-- (utils/ddmac_analytics_client.py -> execute_rpc)
+--
+-- DEPLOY ORDER: run this file in the DDMac Analytics Supabase SQL editor
+-- BEFORE deploying code that calls these functions. Every statement is
+-- "create or replace", so re-running it is safe.
+--
+-- Until upsert_task_progress_bulk exists, update_foreman_task_progress falls
+-- back to looking up the task and inserting into task_progress directly; the
+-- other tools report an error instead.
+
+
+-- get_task_progress_status: latest progress for several tasks in one call
+create or replace function get_latest_task_progress_bulk(task_ids int[])
+returns table(task_id int, progress numeric)
+language sql stable as $$
+  select distinct on (tp.task_id) tp.task_id, tp.progress
+  from task_progress tp
+  where tp.task_id = any(task_ids)
+  order by tp.task_id, tp.created_at desc
+$$;
+
+
+-- get_project_team_hours: hours per team member, aggregated server-side
+create or replace function get_project_team_hours(p_jobcode_id bigint)
+returns table(user_id bigint, username text, total_seconds numeric)
+language sql stable as $$
+  select t.user_id, u.username, sum(t.duration)
+  from timesheets t
+  left join users u on u.id = t.user_id
+  where t.jobcode_id = p_jobcode_id
+  group by t.user_id, u.username
+  order by 3 desc
+$$;
+
+
+-- get_project_overview: estimate/actual totals for one project
+-- (the EVERYTHING rollup task replaces the per-task sums when present)
+create or replace function get_project_overview_stats(p_job_name text)
+returns table(total_est_hours numeric, total_est_cost numeric,
+              actual_hours numeric, task_count bigint)
+language sql stable as $$
+  with est as (
+    select
+      coalesce(sum(time_estimate) filter (where task_name ilike '%EVERYTHING%'), 0) as every_hours,
+      coalesce(sum(cost_estimate) filter (where task_name ilike '%EVERYTHING%'), 0) as every_cost,
+      bool_or(task_name ilike '%EVERYTHING%') as has_everything,
+      coalesce(sum(time_estimate), 0) as all_hours,
+      coalesce(sum(cost_estimate), 0) as all_cost,
+      count(*) as task_count
+    from accubid_breakdowns where job_name = p_job_name
+  )
+  select
+    case when coalesce(has_everything, false) then every_hours else all_hours end,
+    case when coalesce(has_everything, false) then every_cost else all_cost end,
+    coalesce((select sum(t.duration) from timesheets t
+              join jobcodes j on j.id = t.jobcode_id
+              where j.name = p_job_name), 0) / 3600.0,
+    task_count
+  from est
+$$;
+
+
+-- update_foreman_task_progress(_bulk): validate task IDs and insert every
+-- update in one statement; unknown task IDs are skipped
+create or replace function upsert_task_progress_bulk(updates jsonb)
+returns table(task_id int, progress float, task_name text, job_name text)
+language sql as $$
+  with ins as (
+    insert into task_progress(task_id, progress)
+    select x.task_id, x.progress
+    from jsonb_to_recordset(updates) as x(task_id int, progress float)
+    where exists (select 1 from accubid_breakdowns b where b.id = x.task_id)
+    returning task_progress.task_id, task_progress.progress
+  )
+  select ins.task_id, ins.progress, b.task_name, b.job_name
+  from ins join accubid_breakdowns b on b.id = ins.task_id
+$$;
+
+
+-- get_employee_client_breakdown: top clients by hours from the existing
+-- get_user_client_time_distribution, plus the employee's overall total hours
+-- and client count (window aggregates are computed before the limit)
+create or replace function get_user_client_time_distribution_top(
+  user_id_param int,
+  start_date_param date,
+  end_date_param date,
+  limit_param int default 10
+)
+returns table(client_name text, total_hours numeric, sessions bigint,
+              avg_session_hours numeric, overall_total_hours numeric,
+              client_count bigint)
+language sql stable as $$
+  select
+    d.client_name::text,
+    d.total_hours::numeric,
+    d.sessions::bigint,
+    d.avg_session_hours::numeric,
+    sum(d.total_hours) over ()::numeric,
+    count(*) over ()
+  from get_user_client_time_distribution(user_id_param, start_date_param, end_date_param) d
+  order by d.total_hours desc
+  limit limit_param
+$$;
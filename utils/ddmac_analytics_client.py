@@ -3,16 +3,58 @@ DDMac Analytics Supabase Client
 Separate client for DDMac Analytics database (different from communication database)
 """
 import os
-from supabase import create_client, Client
+import json
+import threading
+import time
+from collections import OrderedDict
+import httpx
+from postgrest.exceptions import APIError
+from supabase import create_client, Client, ClientOptions
 from dotenv import load_dotenv
-from typing import Dict, List, Optional, Any
-import pandas as pd
+from typing import Dict, List, Optional, Any, Tuple
 
 load_dotenv()
 
+class RPCNotFoundError(Exception):
+    """The RPC function does not exist (not yet deployed; see sql/analytics_functions.sql)"""
+
+# Analytics RPCs can scan large tables, so allow a longer PostgREST timeout;
+# no auth session refresh for the service-key client
+_CLIENT_OPTIONS = ClientOptions(
+    postgrest_client_timeout=60,
+    auto_refresh_token=False,
+    persist_session=False
+)
+
 class DDMacAnalyticsClient:
     """Client for DDMac Analytics Supabase database"""
     
+    # Process-wide RPC result cache shared by all client instances
+    # key: (function_name, canonical params JSON) -> (stored_at, result)
+    # Invalidation only reaches this process, so other gunicorn workers can
+    # serve a result up to its TTL old after a write.
+    RPC_CACHE_TTL_SECONDS = 60.0
+    RPC_CACHE_MAX_ENTRIES = 256
+    _rpc_cache: "OrderedDict[Tuple[str, str], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+    _rpc_cache_lock = threading.Lock()
+    
+    # Read RPCs are idempotent, so transient failures are retried with
+    # exponential backoff (mutating RPCs are sent once)
+    RPC_MAX_ATTEMPTS = 3
+    RPC_RETRY_BACKOFF_SECONDS = 0.5
+    # Gateway errors arrive as non-JSON bodies, which postgrest reports with
+    # the HTTP status as the error code
+    RPC_RETRYABLE_CODES = frozenset({"429", "502", "503", "504"})
+    # PostgREST "function not found" (PGRST202) and Postgres undefined_function
+    RPC_NOT_FOUND_CODES = frozenset({"PGRST202", "42883"})
+    
+    # Cached read RPCs that go stale when a table is written; these keep a
+    # short TTL so other workers catch up with a foreman update within seconds
+    CACHE_DEPENDENCIES: Dict[str, List[str]] = {
+        "task_progress": ["get_accubid_task_summary", "get_latest_task_progress_bulk"],
+    }
+    DEPENDENT_RPC_CACHE_TTL_SECONDS = 5.0
+    
     def __init__(self):
         """Initialize DDMac Analytics Supabase client from environment variables"""
         url: str = os.environ.get("DDMAC_ANALYTICS_SUPABASE_URL")
@@ -21,24 +63,114 @@ class DDMacAnalyticsClient:
         if not url or not key:
             raise ValueError("DDMAC_ANALYTICS_SUPABASE_URL and DDMAC_ANALYTICS_SUPABASE_KEY must be set in environment variables")
         
-        self.client: Client = create_client(url, key)
+        self.client: Client = create_client(url, key, options=_CLIENT_OPTIONS)
     
-    def execute_rpc(self, function_name: str, params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    def execute_rpc(self, function_name: str, params: Dict[str, Any] = None, cache: bool = True) -> List[Dict[str, Any]]:
         """
         Execute Supabase RPC function
         
+        Read results are served from a bounded LRU cache with a TTL, and
+        transient failures (connection errors, 429/5xx gateway responses) are
+        retried with exponential backoff. Pass cache=False for mutating RPCs;
+        they are sent once and bypass the cache (callers invalidate the reads
+        they affect via CACHE_DEPENDENCIES).
+        
         Args:
             function_name: Name of the RPC function
             params: Parameters for the function
+            cache: Whether the RPC is a cacheable read (default: True)
         
         Returns:
             List of result dictionaries
         """
-        try:
-            response = self.client.rpc(function_name, params or {}).execute()
-            return response.data if response.data else []
-        except Exception as e:
-            raise Exception(f"Failed to execute RPC {function_name}: {str(e)}")
+        key = (function_name, json.dumps(params or {}, sort_keys=True, default=str))
+        
+        if cache:
+            cached = self._get_cached_rpc(key)
+            if cached is not None:
+                return cached
+        
+        attempts = self.RPC_MAX_ATTEMPTS if cache else 1
+        
+        for attempt in range(1, attempts + 1):
+            try:
+                response = self.client.rpc(function_name, params or {}).execute()
+                result = response.data or []
+                break
+            except APIError as e:
+                if str(e.code) in self.RPC_NOT_FOUND_CODES:
+                    raise RPCNotFoundError(f"Failed to execute RPC {function_name}: {self._error_detail(e)}")
+                if str(e.code) in self.RPC_RETRYABLE_CODES and attempt < attempts:
+                    time.sleep(self.RPC_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+                    continue
+                # Keep PostgREST's explanation (message/hint), not just the code
+                raise Exception(f"Failed to execute RPC {function_name}: {self._error_detail(e)}")
+            except httpx.TransportError as e:
+                if attempt < attempts:
+                    time.sleep(self.RPC_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+                    continue
+                raise Exception(f"Failed to execute RPC {function_name}: {str(e)}")
+            except Exception as e:
+                raise Exception(f"Failed to execute RPC {function_name}: {str(e)}")
+        
+        if cache:
+            self._store_cached_rpc(key, result)
+        
+        return result
+    
+    @staticmethod
+    def _error_detail(error: APIError) -> str:
+        """Describe a failed PostgREST call using its code, message and hint"""
+        detail = f"{error.code} {error.message}"
+        if error.hint:
+            detail += f" (hint: {error.hint})"
+        return detail
+    
+    @classmethod
+    def _get_cached_rpc(cls, key: Tuple[str, str]) -> Optional[List[Dict[str, Any]]]:
+        """Return a fresh cached RPC result, or None on miss/expiry"""
+        with cls._rpc_cache_lock:
+            entry = cls._rpc_cache.get(key)
+            if entry is None:
+                return None
+            stored_at, result = entry
+            if time.monotonic() - stored_at > cls._rpc_cache_ttl(key[0]):
+                del cls._rpc_cache[key]
+                return None
+            cls._rpc_cache.move_to_end(key)
+            return result
+    
+    @classmethod
+    def _rpc_cache_ttl(cls, function_name: str) -> float:
+        """TTL for a cached RPC (short for reads of frequently written tables)"""
+        for function_names in cls.CACHE_DEPENDENCIES.values():
+            if function_name in function_names:
+                return cls.DEPENDENT_RPC_CACHE_TTL_SECONDS
+        return cls.RPC_CACHE_TTL_SECONDS
+    
+    @classmethod
+    def _store_cached_rpc(cls, key: Tuple[str, str], result: List[Dict[str, Any]]):
+        """Store an RPC result, evicting the least recently used entries"""
+        with cls._rpc_cache_lock:
+            cls._rpc_cache[key] = (time.monotonic(), result)
+            cls._rpc_cache.move_to_end(key)
+            while len(cls._rpc_cache) > cls.RPC_CACHE_MAX_ENTRIES:
+                cls._rpc_cache.popitem(last=False)
+    
+    @classmethod
+    def invalidate_rpc_cache(cls, function_names: Optional[List[str]] = None):
+        """
+        Drop cached RPC results
+        
+        Args:
+            function_names: RPC names to invalidate (default: all)
+        """
+        with cls._rpc_cache_lock:
+            if function_names is None:
+                cls._rpc_cache.clear()
+                return
+            for key in [k for k in cls._rpc_cache if k[0] in function_names]:
+                del cls._rpc_cache[key]
     
     def query_table(self, table_name: str, select_cols: str = "*", filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """
@@ -47,7 +179,9 @@ class DDMacAnalyticsClient:
         Args:
             table_name: Name of the table
             select_cols: Columns to select (default: *)
-            filters: Dictionary of {column: value} filters
+            filters: Dictionary of {column: value} equality filters; a value may
+                also be an (operator, criteria) tuple for any PostgREST operator,
+                e.g. {"task_name": ("not.ilike", "*EVERYTHING*")}
         
         Returns:
             List of result dictionaries
@@ -57,13 +191,68 @@ class DDMacAnalyticsClient:
             
             if filters:
                 for column, value in filters.items():
-                    query = query.eq(column, value)
+                    if isinstance(value, tuple):
+                        operator, criteria = value
+                        query = query.filter(column, operator, criteria)
+                    else:
+                        query = query.eq(column, value)
             
             response = query.execute()
             return response.data if response.data else []
         except Exception as e:
             raise Exception(f"Failed to query table {table_name}: {str(e)}")
     
+    def query_table_in(
+        self,
+        table_name: str,
+        select_cols: str,
+        column: str,
+        values: List[Any],
+        page_size: int = 1000,
+        order_by: str = "id"
+    ) -> List[Dict[str, Any]]:
+        """
+        Query a table for rows whose column matches any of the given values
+        
+        Emits a single PostgREST ``column=in.(v1,v2,...)`` filter instead of one
+        request per value. Pages through results so the server row cap does not
+        silently truncate bulk reads; pages are ordered by a unique column so
+        rows are neither repeated nor skipped between page requests.
+        
+        Args:
+            table_name: Name of the table
+            select_cols: Columns to select
+            column: Column to filter on
+            values: Values to match
+            page_size: Rows fetched per request
+            order_by: Unique column to order pages by (default: id)
+        
+        Returns:
+            List of result dictionaries
+        """
+        if not values:
+            return []
+        
+        try:
+            rows: List[Dict[str, Any]] = []
+            start = 0
+            while True:
+                response = (
+                    self.client.table(table_name)
+                    .select(select_cols)
+                    .in_(column, list(values))
+                    .order(order_by)
+                    .range(start, start + page_size - 1)
+                    .execute()
+                )
+                page = response.data or []
+                rows.extend(page)
+                if len(page) < page_size:
+                    return rows
+                start += page_size
+        except Exception as e:
+            raise Exception(f"Failed to query table {table_name}: {str(e)}")
+    
     def get_employee_list(self) -> List[Dict[str, Any]]:
         """Get list of all active employees"""
         try:
@@ -84,6 +273,9 @@ class DDMacAnalyticsClient:
         """
         Insert task progress update
         
+        Single-update path used when the upsert_task_progress_bulk RPC is not
+        deployed (the caller validates the task ID first).
+        
         Args:
             task_id: Task ID from accubid_breakdowns
             progress: Progress percentage (0-100)
@@ -96,33 +288,48 @@ class DDMacAnalyticsClient:
                 "task_id": task_id,
                 "progress": progress
             }).execute()
-            return response.data[0] if response.data else {}
         except Exception as e:
             raise Exception(f"Failed to insert task progress: {str(e)}")
+        
+        # Task analytics reads must not be served stale after a foreman update
+        self.invalidate_rpc_cache(self.CACHE_DEPENDENCIES["task_progress"])
+        return response.data[0] if response.data else {}
     
-    def get_latest_task_progress(self, task_id: int) -> Optional[float]:
+    def upsert_task_progress_bulk(self, updates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Get latest progress for a task
+        Validate and insert several task progress updates in one round-trip
+        
+        Updates whose task_id does not exist in accubid_breakdowns are skipped
+        by the RPC.
         
         Args:
-            task_id: Task ID
+            updates: List of {"task_id": int, "progress": float} dictionaries
         
         Returns:
-            Latest progress percentage or None
+            Inserted records joined with task_name and job_name
         """
-        try:
-            response = (
-                self.client.table("task_progress")
-                .select("progress, created_at")
-                .eq("task_id", task_id)
-                .order("created_at", desc=True)
-                .limit(1)
-                .execute()
-            )
-            
-            if response.data and len(response.data) > 0:
-                return response.data[0].get("progress", 0)
-            return None
-        except Exception as e:
-            raise Exception(f"Failed to get task progress: {str(e)}")
-
+        if not updates:
+            return []
+        
+        rows = self.execute_rpc('upsert_task_progress_bulk', {'updates': updates}, cache=False)
+        
+        # Task analytics reads must not be served stale after a foreman update
+        self.invalidate_rpc_cache(self.CACHE_DEPENDENCIES["task_progress"])
+        return rows
+    
+    def get_latest_task_progress_bulk(self, task_ids: List[int]) -> Dict[int, float]:
+        """
+        Get latest progress for several tasks in one round-trip
+        
+        Args:
+            task_ids: Task IDs
+        
+        Returns:
+            Mapping of task ID to latest progress percentage (tasks without
+            progress updates are absent)
+        """
+        if not task_ids:
+            return {}
+        
+        rows = self.execute_rpc('get_latest_task_progress_bulk', {'task_ids': list(task_ids)})
+        return {row.get('task_id'): row.get('progress', 0) for row in rows}
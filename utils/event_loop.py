@@ -0,0 +1,116 @@
+"""
+Persistent per-thread event loops for the synchronous entry points
+"""
+import asyncio
+import atexit
+import threading
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, TypeVar
+
+T = TypeVar("T")
+
+# One loop per thread, reused across calls: gunicorn's gthread workers serve
+# requests on a fixed pool of threads, and a loop is bound to one thread.
+# Loops of threads that have exited (e.g. the Flask dev server's per-request
+# threads) are closed the next time a loop is created.
+_thread_state = threading.local()
+_thread_loops: Dict[threading.Thread, asyncio.AbstractEventLoop] = {}
+_thread_loops_lock = threading.Lock()
+
+# Async cleanups registered against the loop that owns the resource (e.g. a
+# pooled HTTP client); they are awaited before that loop is closed
+_loop_cleanups: Dict[asyncio.AbstractEventLoop, List[Callable[[], Awaitable[Any]]]] = {}
+_loop_cleanups_lock = threading.Lock()
+
+def add_loop_cleanup(callback: Callable[[], Awaitable[Any]]):
+    """
+    Register an async callback to run before the current event loop is closed
+    
+    Args:
+        callback: Zero-argument coroutine function (e.g. client.aclose)
+    """
+    loop = asyncio.get_running_loop()
+    with _loop_cleanups_lock:
+        # Loops not created by run_sync never run their cleanups; drop them
+        # once closed so their resources can be garbage collected
+        for stale in [l for l in _loop_cleanups if l.is_closed()]:
+            del _loop_cleanups[stale]
+        _loop_cleanups.setdefault(loop, []).append(callback)
+
+async def _run_loop_cleanups():
+    """Await and forget the cleanups registered for the running loop"""
+    with _loop_cleanups_lock:
+        callbacks = _loop_cleanups.pop(asyncio.get_running_loop(), [])
+    for callback in callbacks:
+        try:
+            await callback()
+        except Exception:
+            pass
+
+async def _shutdown_loop():
+    """Release the running loop's resources, as asyncio.run does on exit"""
+    await _run_loop_cleanups()
+    loop = asyncio.get_running_loop()
+    tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await loop.shutdown_asyncgens()
+    await loop.shutdown_default_executor()
+
+def _close_loop(loop: asyncio.AbstractEventLoop):
+    """Run a loop's cleanups and close it (the loop must not be running)"""
+    try:
+        loop.run_until_complete(_shutdown_loop())
+    except Exception:
+        pass
+    finally:
+        loop.close()
+
+def _close_exited_thread_loops():
+    """Close the loops of threads that have exited"""
+    with _thread_loops_lock:
+        exited = [t for t in _thread_loops if not t.is_alive()]
+        loops = [_thread_loops.pop(t) for t in exited]
+    for loop in loops:
+        _close_loop(loop)
+
+@atexit.register
+def _close_all_loops():
+    """Close every idle loop at interpreter shutdown"""
+    with _thread_loops_lock:
+        loops = list(_thread_loops.values())
+        _thread_loops.clear()
+    for loop in loops:
+        if not loop.is_running() and not loop.is_closed():
+            _close_loop(loop)
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Get this thread's persistent event loop, creating it on first use"""
+    loop = getattr(_thread_state, "loop", None)
+    if loop is not None and not loop.is_closed():
+        return loop
+    
+    _close_exited_thread_loops()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    _thread_state.loop = loop
+    with _thread_loops_lock:
+        _thread_loops[threading.current_thread()] = loop
+    return loop
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a coroutine to completion on this thread's persistent event loop
+    
+    Unlike asyncio.run, the loop is kept for the thread's next call, so its
+    default executor (used by asyncio.to_thread) and loop-bound HTTP clients
+    stay warm. The loop and everything registered through add_loop_cleanup
+    are released once the thread has exited.
+    
+    Args:
+        coro: Coroutine to run
+    
+    Returns:
+        The coroutine's result
+    """
+    return get_event_loop().run_until_complete(coro)
@@ -1,9 +1,21 @@
 import logging
 import os
-import json
+import orjson
 from datetime import datetime
 from typing import Any, Dict
 
+# AgentLogger level names -> logging levels
+_LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+}
+
+# Per-run JSON/text artifacts (payloads, agent outputs) are for debugging;
+# set AGENT_SAVE_ARTIFACTS=0 to skip the writes. full_log.txt is always kept.
+_SAVE_ARTIFACTS = os.getenv("AGENT_SAVE_ARTIFACTS", "1").lower() not in ("0", "false")
+
 class AgentLogger:
     def __init__(self, run_id: str = None):
         """
@@ -46,26 +58,39 @@ class AgentLogger:
         self.logger.addHandler(file_handler)
         self.logger.addHandler(console_handler)
     
-    def log(self, message: str, level: str = "INFO"):
-        """Log a message"""
-        if level == "DEBUG":
-            self.logger.debug(message)
-        elif level == "INFO":
-            self.logger.info(message)
-        elif level == "WARNING":
-            self.logger.warning(message)
-        elif level == "ERROR":
-            self.logger.error(message)
+    def log(self, message: str, level: str = "INFO", *args):
+        """
+        Log a message
+        
+        Extra args are %-formatted into the message by logging itself, only
+        when a handler actually emits the record.
+        """
+        levelno = _LEVELS.get(level)
+        if levelno is not None:
+            self.logger.log(levelno, message, *args)
+    
+    def exception(self, message: str, *args):
+        """
+        Log an ERROR message with the traceback of the exception being handled
+        
+        The traceback is formatted by logging itself, only when a handler
+        actually emits the record.
+        """
+        self.logger.error(message, *args, exc_info=True)
     
     def save_json(self, filename: str, data: Any):
         """Save data as JSON file in output directory"""
+        if not _SAVE_ARTIFACTS:
+            return
         filepath = f"{self.output_dir}/{filename}"
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
         self.log(f"Saved {filename}")
     
     def save_text(self, filename: str, text: str):
         """Save text to file in output directory"""
+        if not _SAVE_ARTIFACTS:
+            return
         filepath = f"{self.output_dir}/{filename}"
         with open(filepath, 'w') as f:
             f.write(text)
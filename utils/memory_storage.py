@@ -2,7 +2,7 @@
 Memory Storage for intermediate results and context
 """
 import os
-import json
+import orjson
 from typing import Dict, Any, Optional
 from datetime import datetime
 
@@ -41,13 +41,13 @@ class MemoryStorage:
         filename = f"{request_id}_{agent_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         filepath = os.path.join(self.intermediate_dir, filename)
         
-        with open(filepath, 'w') as f:
-            json.dump({
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps({
                 "request_id": request_id,
                 "agent": agent_name,
                 "timestamp": datetime.now().isoformat(),
                 "result": result
-            }, f, indent=2, default=str)
+            }, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     
     def get_intermediate_results(self, request_id: str) -> list:
         """
@@ -64,8 +64,8 @@ class MemoryStorage:
         for filename in os.listdir(self.intermediate_dir):
             if filename.startswith(request_id):
                 filepath = os.path.join(self.intermediate_dir, filename)
-                with open(filepath, 'r') as f:
-                    results.append(json.load(f))
+                with open(filepath, 'rb') as f:
+                    results.append(orjson.loads(f.read()))
         
         return sorted(results, key=lambda x: x.get("timestamp", ""))
     
@@ -80,12 +80,12 @@ class MemoryStorage:
         filename = f"{request_id}_context.json"
         filepath = os.path.join(self.context_dir, filename)
         
-        with open(filepath, 'w') as f:
-            json.dump({
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps({
                 "request_id": request_id,
                 "timestamp": datetime.now().isoformat(),
                 "context": context
-            }, f, indent=2, default=str)
+            }, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     
     def get_context(self, request_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -103,7 +103,7 @@ class MemoryStorage:
         if not os.path.exists(filepath):
             return None
         
-        with open(filepath, 'r') as f:
-            data = json.load(f)
+        with open(filepath, 'rb') as f:
+            data = orjson.loads(f.read())
             return data.get("context")
 
@@ -2,7 +2,7 @@
 Plan Manager for task planning and tracking
 """
 import os
-import json
+import orjson
 from typing import Dict, List, Optional
 from datetime import datetime
 from enum import Enum
@@ -64,8 +64,8 @@ class PlanManager:
         
         # Save plan
         plan_file = os.path.join(self.plan_dir, f"{plan_id}.json")
-        with open(plan_file, 'w') as f:
-            json.dump(plan, f, indent=2)
+        with open(plan_file, 'wb') as f:
+            f.write(orjson.dumps(plan, option=orjson.OPT_INDENT_2))
         
         return plan_id
     
@@ -84,8 +84,8 @@ class PlanManager:
         if not os.path.exists(plan_file):
             return
         
-        with open(plan_file, 'r') as f:
-            plan = json.load(f)
+        with open(plan_file, 'rb') as f:
+            plan = orjson.loads(f.read())
         
         # Update task
         for task in plan["tasks"]:
@@ -97,8 +97,8 @@ class PlanManager:
                 break
         
         # Save updated plan
-        with open(plan_file, 'w') as f:
-            json.dump(plan, f, indent=2)
+        with open(plan_file, 'wb') as f:
+            f.write(orjson.dumps(plan, option=orjson.OPT_INDENT_2))
     
     def get_plan(self, plan_id: str) -> Optional[Dict]:
         """
@@ -115,6 +115,6 @@ class PlanManager:
         if not os.path.exists(plan_file):
             return None
         
-        with open(plan_file, 'r') as f:
-            return json.load(f)
+        with open(plan_file, 'rb') as f:
+            return orjson.loads(f.read())
 
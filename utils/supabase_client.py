@@ -1,12 +1,35 @@
 import os
-from supabase import create_client, Client
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from supabase import create_client, Client, ClientOptions
 from dotenv import load_dotenv
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 # Load environment variables
 load_dotenv()
 
+# Service-key client: explicit PostgREST timeout, no auth session refresh
+# (the underlying httpx session keeps pooled keep-alive connections)
+_CLIENT_OPTIONS = ClientOptions(
+    postgrest_client_timeout=30,
+    auto_refresh_token=False,
+    persist_session=False
+)
+
+# Worker threads for issuing independent queries concurrently
+_QUERY_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="supabase-query")
+
 class SupabaseClient:
+    # Rules change rarely but are read on every request; cache them briefly.
+    # Process-wide, shared by all instances; insert_rule invalidates it in
+    # this process only, so the TTL bounds how long other gunicorn workers
+    # can miss a rule saved moments ago (kept to seconds for "remember that...")
+    RULES_CACHE_TTL_SECONDS = 5.0
+    _rules_cache: Optional[Tuple[float, List[Dict[str, Any]]]] = None
+    _rules_cache_lock = threading.Lock()
+    
     def __init__(self):
         """Initialize Supabase client from environment variables"""
         url: str = os.environ.get("SUPABASE_URL")
@@ -15,7 +38,7 @@ class SupabaseClient:
         if not url or not key:
             raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment variables")
         
-        self.client: Client = create_client(url, key)
+        self.client: Client = create_client(url, key, options=_CLIENT_OPTIONS)
     
     def insert_input(self, user: str, source: str, input_text: str, subject: Optional[str]) -> Dict[str, Any]:
         """
@@ -45,6 +68,49 @@ class SupabaseClient:
         except Exception as e:
             raise Exception(f"Failed to insert input: {str(e)}")
     
+    def claim_input_record(self, record_id: Any) -> bool:
+        """
+        Claim an input_db record for processing
+        
+        Conditional update on processing_started_at, so only one webhook
+        worker (across processes) wins for a given record. The claim is kept
+        after a successful run; release_input_record drops it after a failure.
+        
+        Args:
+            record_id: input_db record id
+        
+        Returns:
+            True if this call claimed the record
+        """
+        try:
+            response = (
+                self.client.table("input_db")
+                .update({"processing_started_at": datetime.now(timezone.utc).isoformat()})
+                .eq("id", record_id)
+                .is_("processing_started_at", "null")
+                .execute()
+            )
+            return bool(response.data)
+        except Exception as e:
+            raise Exception(f"Failed to claim input record: {str(e)}")
+    
+    def release_input_record(self, record_id: Any):
+        """
+        Release a claim taken by claim_input_record so a redelivery can retry
+        
+        Args:
+            record_id: input_db record id
+        """
+        try:
+            (
+                self.client.table("input_db")
+                .update({"processing_started_at": None})
+                .eq("id", record_id)
+                .execute()
+            )
+        except Exception as e:
+            raise Exception(f"Failed to release input record: {str(e)}")
+    
     def get_message_history(self, user: str, source: str, subject: Optional[str], current_created_at: str) -> Dict[str, Any]:
         """
         Get message history for building context
@@ -66,7 +132,7 @@ class SupabaseClient:
         try:
             # Get before-last message: same user, same source, different subject (unless source is NULL)
             # If source is NULL, can be same subject
-            query = (
+            same_source_query = (
                 self.client.table("input_db")
                 .select("input, source, created_at")
                 .eq("user", user)
@@ -77,25 +143,27 @@ class SupabaseClient:
             
             # If subject is not None, filter by different subject
             if subject is not None:
-                query = query.neq("subject", subject)
-            
-            response = query.limit(1).execute()
-            
-            if response.data:
-                history["before_last_message_same_user_same_source_different_subject"] = response.data
+                same_source_query = same_source_query.neq("subject", subject)
             
             # Get last message from same user but different source
-            response = (
+            other_source_query = (
                 self.client.table("input_db")
                 .select("input, source, created_at")
                 .eq("user", user)
                 .neq("source", source)
                 .lt("created_at", current_created_at)
                 .order("created_at", desc=True)
-                .limit(1)
-                .execute()
             )
             
+            # The two lookups are independent; overlap their round-trips
+            same_source_future = _QUERY_EXECUTOR.submit(same_source_query.limit(1).execute)
+            other_source_future = _QUERY_EXECUTOR.submit(other_source_query.limit(1).execute)
+            
+            response = same_source_future.result()
+            if response.data:
+                history["before_last_message_same_user_same_source_different_subject"] = response.data
+            
+            response = other_source_future.result()
             if response.data:
                 history["last_message_same_user_different_source"] = response.data
             
@@ -108,18 +176,37 @@ class SupabaseClient:
         """
         Fetch all rules from rules_db table
         
+        Served from a short TTL cache. A rule inserted through insert_rule is
+        visible at once in this worker process; other workers and external
+        inserts see it within RULES_CACHE_TTL_SECONDS.
+        
         Returns:
             List of all rule records
         """
+        with self._rules_cache_lock:
+            cached = SupabaseClient._rules_cache
+            if cached is not None and time.monotonic() - cached[0] <= self.RULES_CACHE_TTL_SECONDS:
+                return list(cached[1])
+        
         try:
             response = (
                 self.client.table("rules_db")
                 .select("*")
                 .execute()
             )
-            return response.data if response.data else []
+            rules = response.data if response.data else []
         except Exception as e:
             raise Exception(f"Failed to get rules: {str(e)}")
+        
+        with self._rules_cache_lock:
+            SupabaseClient._rules_cache = (time.monotonic(), rules)
+        return list(rules)
+    
+    @classmethod
+    def invalidate_rules_cache(cls):
+        """Drop cached rules so the next get_all_rules reads rules_db"""
+        with cls._rules_cache_lock:
+            cls._rules_cache = None
     
     def insert_rule(self, rule_maker: str, rule_org: str, rule_instruction: str) -> Dict[str, Any]:
         """
@@ -143,7 +230,9 @@ class SupabaseClient:
                 })
                 .execute()
             )
-            return response.data[0] if response.data else {}
         except Exception as e:
             raise Exception(f"Failed to insert rule: {str(e)}")
+        
+        self.invalidate_rules_cache()
+        return response.data[0] if response.data else {}
 
@@ -4,6 +4,34 @@ WhatsApp helper functions for phone number extraction and message formatting
 import re
 from typing import Dict, Any, Optional
 
+# Where a phone number may appear, in priority order:
+# (in current_message_input?, field name, value must look like a phone number)
+_PHONE_NUMBER_FIELDS = (
+    (True, "sender", True),
+    (False, "phone_number", False),
+    (True, "phone_number", False),
+    (False, "user", True),
+    (True, "user", True),
+)
+
+# Confirmation status -> emoji (unknown statuses fall back to ℹ️)
+_STATUS_EMOJI = {
+    "success": "✅",
+    "error": "❌",
+    "processing": "⏳"
+}
+
+# Instructions for the WhatsApp agent; only the substitution runs per send
+_WHATSAPP_TASK_TEMPLATE = """Send this WhatsApp confirmation message.
+
+CRITICAL: Use the phone number EXACTLY as provided with the + prefix for international format.
+Phone number (with + prefix): {phone_number}
+
+Message to send:
+{message}
+
+IMPORTANT: The phone number {phone_number} already includes the + prefix and country code. Use it EXACTLY as shown."""
+
 def extract_phone_number(input_body: Dict[str, Any]) -> Optional[str]:
     """
     Extract phone number from input body
@@ -14,23 +42,13 @@ def extract_phone_number(input_body: Dict[str, Any]) -> Optional[str]:
     Returns:
         Phone number string or None if not found
     """
-    # Check various locations for phone number
-    current_message = input_body.get("current_message_input", {})
-    
-    # Try sender field first
-    sender = current_message.get("sender")
-    if sender and is_phone_number(sender):
-        return normalize_phone_number(sender)
-    
-    # Try phone_number field
-    phone = input_body.get("phone_number") or current_message.get("phone_number")
-    if phone:
-        return normalize_phone_number(phone)
+    # Check various locations for phone number, stopping at the first hit
+    current_message = input_body.get("current_message_input") or {}
     
-    # Try user field
-    user = input_body.get("user") or current_message.get("user")
-    if user and is_phone_number(user):
-        return normalize_phone_number(user)
+    for in_message, field, must_look_like_phone in _PHONE_NUMBER_FIELDS:
+        value = (current_message if in_message else input_body).get(field)
+        if value and (not must_look_like_phone or is_phone_number(value)):
+            return normalize_phone_number(value)
     
     return None
 
@@ -107,11 +125,7 @@ def format_whatsapp_confirmation(
     from utils.message_utils import add_bot_marker
     
     # Status emoji
-    status_emoji = {
-        "success": "✅",
-        "error": "❌",
-        "processing": "⏳"
-    }.get(status, "ℹ️")
+    status_emoji = _STATUS_EMOJI.get(status, "ℹ️")
     
     # Truncate summary if too long
     max_length = 800  # WhatsApp comfort zone
@@ -142,6 +156,19 @@ def format_whatsapp_confirmation(
     
     return message
 
+def build_whatsapp_task(phone_number: str, message: str) -> str:
+    """
+    Build the WhatsApp agent task for sending a confirmation message
+    
+    Args:
+        phone_number: Recipient phone number (with + prefix)
+        message: Formatted confirmation message
+    
+    Returns:
+        Task instructions for the WhatsApp agent
+    """
+    return _WHATSAPP_TASK_TEMPLATE.format_map({"phone_number": phone_number, "message": message})
+
 def mask_phone_number(phone: str) -> str:
     """
     Mask phone number for privacy in logs
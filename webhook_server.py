@@ -1,20 +1,112 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request
+import orjson
 import os
 import sys
-from datetime import datetime
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Optional, Tuple
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from utils.supabase_client import SupabaseClient
 from utils.logger import AgentLogger
-from utils.whatsapp_helper import extract_phone_number, format_whatsapp_confirmation, mask_phone_number
+from utils.event_loop import run_sync
+from utils.whatsapp_helper import extract_phone_number, format_whatsapp_confirmation, build_whatsapp_task, mask_phone_number
 from utils.message_utils import is_bot_message
 from agent_system.memory_agent import MemoryAgent
 from agent_system.orchestrator_agent import OrchestratorAgent
 from agent_system.subagents.whatsapp_agent import WhatsAppAgent
 
 app = Flask(__name__)
+# Serve "/health/" etc. directly instead of answering with a redirect
+app.url_map.strict_slashes = False
+
+# Build the Supabase client once at startup so every request reuses its HTTP
+# session; fall back to lazy construction if the environment isn't ready yet
+try:
+    _supabase_client: Optional[SupabaseClient] = SupabaseClient()
+except Exception as e:
+    print(f"⚠️ Supabase client not initialized at startup: {str(e)}")
+    _supabase_client = None
+
+# Warm the pooled sub-agents (Composio tool specs, SDK clients) at startup
+try:
+    OrchestratorAgent.warm_up()
+except Exception as e:
+    print(f"⚠️ Sub-agent warm-up failed, agents will be built on first request: {str(e)}")
+
+def get_supabase_client() -> SupabaseClient:
+    """Get the shared Supabase client, creating it on first use if needed"""
+    global _supabase_client
+    if _supabase_client is None:
+        _supabase_client = SupabaseClient()
+    return _supabase_client
+
+# Fixed response bodies, serialized once at import
+_NO_JSON_DATA_BODY = orjson.dumps({
+    "status": "error",
+    "message": "No JSON data received"
+})
+
+# Supabase can deliver the same record more than once (retries, duplicate
+# triggers). This cache only dedupes within one worker process (and replays
+# that worker's result); claim_input_record is what stops a redelivery landing
+# on another gunicorn worker from re-running the agents.
+# key: (source, record id) -> (stored_at, result or None while in flight)
+DELIVERY_CACHE_TTL_SECONDS = 300.0
+DELIVERY_CACHE_MAX_ENTRIES = 1024
+_delivery_cache: "OrderedDict[Tuple[Any, Any], Tuple[float, Optional[dict]]]" = OrderedDict()
+_delivery_cache_lock = threading.Lock()
+
+def _claim_delivery(key: Tuple[Any, Any]) -> Tuple[bool, Optional[dict]]:
+    """
+    Claim a record for processing in this worker process
+    
+    Returns:
+        (True, None) if the caller should process it, otherwise
+        (False, previous result or None if still in flight)
+    """
+    with _delivery_cache_lock:
+        now = time.monotonic()
+        entry = _delivery_cache.get(key)
+        if entry is not None and now - entry[0] <= DELIVERY_CACHE_TTL_SECONDS:
+            return False, entry[1]
+        _delivery_cache[key] = (now, None)
+        _delivery_cache.move_to_end(key)
+        while len(_delivery_cache) > DELIVERY_CACHE_MAX_ENTRIES:
+            _delivery_cache.popitem(last=False)
+        return True, None
+
+def _finish_delivery(key: Tuple[Any, Any], result: Optional[dict]):
+    """Store a delivery result, or release the claim so a retry can run"""
+    with _delivery_cache_lock:
+        if result is None or result.get("status") == "error":
+            _delivery_cache.pop(key, None)
+        else:
+            _delivery_cache[key] = (time.monotonic(), result)
+
+def json_response(data, status_code: int = 200) -> Response:
+    """
+    Build a JSON response serialized with orjson
+    
+    Args:
+        data: Response body (dict, or pre-serialized JSON bytes)
+        status_code: HTTP status code
+    
+    Returns:
+        Flask Response with application/json body
+    """
+    if not isinstance(data, bytes):
+        data = orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return Response(
+        data,
+        status=status_code,
+        mimetype='application/json'
+    )
 
 async def process_webhook_request_async(webhook_data: dict) -> dict:
     """
@@ -49,8 +141,9 @@ async def process_webhook_request_async(webhook_data: dict) -> dict:
     # Initialize logger
     logger = AgentLogger(run_id)
     logger.log("=== WEBHOOK REQUEST RECEIVED (DIDDYMAC) ===")
-    logger.log(f"Webhook Data: {webhook_data}")
-    logger.log(f"Record: {record}")
+    # Full payloads go to the log file only (also saved as JSON below)
+    logger.log("Webhook Data: %s", "DEBUG", webhook_data)
+    logger.log("Record: %s", "DEBUG", record)
     logger.log("✅ Message validated: Not a bot confirmation (proceeding with processing)")
     
     # Save webhook payload
@@ -58,9 +151,9 @@ async def process_webhook_request_async(webhook_data: dict) -> dict:
     logger.save_json("record.json", record)
     
     try:
-        # Initialize Supabase client
-        supabase = SupabaseClient()
-        logger.log("Supabase client initialized")
+        # Shared Supabase client (built at startup)
+        supabase = get_supabase_client()
+        logger.log("Supabase client ready")
         
         # Extract fields from record (already in database)
         user = record.get("user")
@@ -131,7 +224,7 @@ async def process_webhook_request_async(webhook_data: dict) -> dict:
         whatsapp_sent = False
         whatsapp_details = None
         
-        if orchestration_result.get("success") and source.lower() == "whatsapp":
+        if orchestration_result.get("success") and (source or "").lower() == "whatsapp":
             logger.log("\n=== WHATSAPP CONFIRMATION ===")
             logger.log("Source is WhatsApp - sending confirmation message...")
             
@@ -154,16 +247,8 @@ async def process_webhook_request_async(webhook_data: dict) -> dict:
                     logger.save_text("whatsapp_confirmation.txt", confirmation_msg)
                     
                     # Send via WhatsApp Agent
-                    whatsapp_agent = WhatsAppAgent(logger)
-                    whatsapp_task = f"""Send this WhatsApp confirmation message.
-
-CRITICAL: Use the phone number EXACTLY as provided with the + prefix for international format.
-Phone number (with + prefix): {phone_number}
-
-Message to send:
-{confirmation_msg}
-
-IMPORTANT: The phone number {phone_number} already includes the + prefix and country code. Use it EXACTLY as shown."""
+                    whatsapp_agent = WhatsAppAgent.get_instance(logger)
+                    whatsapp_task = build_whatsapp_task(phone_number, confirmation_msg)
                     whatsapp_run_result = await whatsapp_agent.run(whatsapp_task, max_turns=10)
                     whatsapp_result = {
                         "success": True,
@@ -237,8 +322,53 @@ def process_webhook_request(webhook_data: dict) -> dict:
     Returns:
         Processing results
     """
-    import asyncio
-    return asyncio.run(process_webhook_request_async(webhook_data))
+    record = webhook_data.get('record', webhook_data)
+    record_id = record.get('id')
+    if record_id is None:
+        return run_sync(process_webhook_request_async(webhook_data))
+    
+    key = (record.get('source'), record_id)
+    claimed, previous = _claim_delivery(key)
+    if not claimed:
+        print(f"⏭️ SKIPPING DUPLICATE DELIVERY: record {record_id}")
+        return previous or {
+            "status": "skipped",
+            "reason": "duplicate_delivery",
+            "message": "Record is already being processed",
+            "record_id": record_id
+        }
+    
+    # Claim the record in input_db so other workers skip it too
+    db_claimed = False
+    try:
+        db_claimed = get_supabase_client().claim_input_record(record_id)
+    except Exception as e:
+        # Schema not migrated or database unreachable; fall back to the
+        # per-process cache rather than dropping the delivery
+        print(f"⚠️ Could not claim record {record_id} in input_db: {str(e)}")
+    else:
+        if not db_claimed:
+            print(f"⏭️ SKIPPING DUPLICATE DELIVERY: record {record_id} claimed by another worker")
+            result = {
+                "status": "skipped",
+                "reason": "duplicate_delivery",
+                "message": "Record is already being processed by another worker",
+                "record_id": record_id
+            }
+            _finish_delivery(key, result)
+            return result
+    
+    result = None
+    try:
+        result = run_sync(process_webhook_request_async(webhook_data))
+        return result
+    finally:
+        _finish_delivery(key, result)
+        if db_claimed and (result is None or result.get("status") == "error"):
+            try:
+                get_supabase_client().release_input_record(record_id)
+            except Exception as e:
+                print(f"⚠️ Could not release claim on record {record_id}: {str(e)}")
 
 @app.route('/', methods=['POST'])
 def webhook_endpoint():
@@ -246,50 +376,59 @@ def webhook_endpoint():
     Main webhook endpoint to receive POST requests from Supabase
     """
     try:
+        raw_body = request.get_data()
+        
         # Log the raw request
         print(f"=== INCOMING REQUEST (DIDDYMAC) ===")
         print(f"Headers: {dict(request.headers)}")
-        print(f"Body: {request.get_data(as_text=True)}")
+        print(f"Body: {raw_body.decode('utf-8', 'replace')}")
         
-        # Get JSON data from request
-        webhook_data = request.get_json()
+        # Reject empty/whitespace bodies before handing them to the parser
+        if not raw_body.strip():
+            return json_response(_NO_JSON_DATA_BODY, 400)
+        
+        # Parse JSON data straight from the raw bytes
+        webhook_data = orjson.loads(raw_body)
         
         if not webhook_data:
-            return jsonify({
-                "status": "error",
-                "message": "No JSON data received"
-            }), 400
+            return json_response(_NO_JSON_DATA_BODY, 400)
         
         # Process the webhook request
         result = process_webhook_request(webhook_data)
         
-        return jsonify(result), 200
+        return json_response(result, 200)
     
     except Exception as e:
         # Print full traceback
-        import traceback
         error_trace = traceback.format_exc()
         print(f"=== ERROR ===")
         print(error_trace)
         
-        return jsonify({
+        response_body = {
             "status": "error",
-            "message": str(e),
-            "traceback": error_trace
-        }), 500
+            "message": str(e)
+        }
+        # The traceback is printed above; only echo it to the caller in debug mode
+        if app.debug:
+            response_body["traceback"] = error_trace
+        
+        return json_response(response_body, 500)
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """
     Health check endpoint
     """
-    return jsonify({
+    return json_response({
         "status": "healthy",
         "service": "DiddyMac Communication Agent System",
-        "timestamp": datetime.now().isoformat()
-    }), 200
+        "timestamp": datetime.now(timezone.utc)  # serialized natively by orjson
+    }, 200)
 
 if __name__ == "__main__":
+    port = int(os.getenv("PORT", "8000"))
+    debug = os.getenv("FLASK_DEBUG", "").lower() in ("1", "true")
+    
     print("=" * 80)
     print("DIDDYMAC WEBHOOK SERVER (AGENTS SDK + GPT-5)")
     print("=" * 80)
@@ -298,11 +437,13 @@ if __name__ == "__main__":
     print(f"Pattern: Agents-as-tools orchestration")
     print(f"Agents: Calendar, Email, Report Writer, WhatsApp")
     print(f"Listening for webhooks from Supabase")
-    print(f"Port: 8000")
-    print(f"Health check: http://localhost:8000/health")
+    print(f"Port: {port}")
+    print(f"Debug mode: {debug}")
+    print(f"Health check: http://localhost:{port}/health")
     print("=" * 80)
     
-    # Run Flask app
+    # Run Flask app (threaded so a long agent run doesn't block health checks;
+    # the debugger/reloader is opt-in via FLASK_DEBUG)
     # Note: In production, use a proper WSGI server like gunicorn
-    app.run(host='0.0.0.0', port=8000, debug=True)
+    app.run(host='0.0.0.0', port=port, debug=debug, threaded=True)
 